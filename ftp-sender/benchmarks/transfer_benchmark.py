@@ -0,0 +1,104 @@
+"""传输块大小基准测试
+
+在独立进程中启动一个临时FTP服务器，分别用默认的8KB块、几种固定块大小、
+自动选择的块大小/发送缓冲区以及零拷贝 sendfile 上传同一个文件，
+对比吞吐量和客户端CPU时间。
+需要额外安装 pyftpdlib：
+
+    pip install pyftpdlib
+    python benchmarks/transfer_benchmark.py --size 256 --rounds 3
+"""
+import argparse
+import ftplib
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from core import ftp_transfer  # noqa: E402
+
+try:
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+except ImportError:
+    sys.exit("需要先安装 pyftpdlib: pip install pyftpdlib")
+
+
+class _Tuning:
+    """模拟任务的传输配置"""
+
+    def __init__(self, blocksize, sndbuf):
+        self.transfer_blocksize = blocksize
+        self.socket_sndbuf = sndbuf
+
+
+def _serve(root, port_queue):
+    logging.getLogger('pyftpdlib').setLevel(logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_user('bench', 'bench', root, perm='elradfmw')
+    handler = type('BenchHandler', (FTPHandler,), {'authorizer': authorizer})
+    server = ThreadedFTPServer(('127.0.0.1', 0), handler)
+    port_queue.put(server.address[1])
+    server.serve_forever()
+
+
+def start_server(root):
+    """在独立进程中启动本地FTP服务器，避免与客户端争用GIL，返回 (process, port)"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(root, port_queue))
+    process.daemon = True
+    process.start()
+    return process, port_queue.get(timeout=10)
+
+
+def run_upload(port, path, blocksize, sndbuf, zero_copy=False):
+    """上传一次文件，返回 (耗时, 客户端CPU时间)，单位秒"""
+    with ftplib.FTP() as ftp:
+        ftp.connect('127.0.0.1', port)
+        ftp.login('bench', 'bench')
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        with open(path, 'rb') as f:
+            ftp_transfer.store(ftp, 'STOR bench.bin', f, blocksize, sndbuf=sndbuf,
+                               zero_copy=zero_copy)
+        return time.perf_counter() - start, time.process_time() - cpu_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FTP传输块大小基准测试")
+    parser.add_argument('--size', type=int, default=256, help="测试文件大小（MB）")
+    parser.add_argument('--rounds', type=int, default=3, help="每种配置的上传次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as server_root, tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'bench.bin')
+        with open(path, 'wb') as f:
+            for _ in range(args.size):
+                f.write(os.urandom(1024 * 1024))
+        file_size = os.path.getsize(path)
+
+        server, port = start_server(server_root)
+        try:
+            auto_blocksize, auto_sndbuf = ftp_transfer.transfer_tuning(_Tuning(0, 0), file_size)
+            configs = [
+                ("默认 8KB", 8192, 0, False),
+                ("64KB", 64 * 1024, 0, False),
+                ("256KB", 256 * 1024, 0, False),
+                (f"自动 {auto_blocksize // 1024}KB", auto_blocksize, auto_sndbuf, False),
+                ("零拷贝 sendfile", auto_blocksize, auto_sndbuf, True),
+            ]
+            for name, blocksize, sndbuf, zero_copy in configs:
+                elapsed, cpu = min(run_upload(port, path, blocksize, sndbuf, zero_copy)
+                                   for _ in range(args.rounds))
+                print(f"{name:<16} {file_size / elapsed / 1024 / 1024:8.1f} MB/s  "
+                      f"耗时 {elapsed:.2f}s  CPU {cpu:.2f}s")
+        finally:
+            server.terminate()
+
+if __name__ == '__main__':
+    main()
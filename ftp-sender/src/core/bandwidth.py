@@ -0,0 +1,181 @@
+import threading
+import time
+from datetime import datetime
+from core.ftp_pool import FTPConnectionPool
+from utils.constants import (BANDWIDTH_BURST_SECONDS, BANDWIDTH_MIN_CHUNK,
+                             BANDWIDTH_PROFILE_CHECK_INTERVAL, DEFAULT_FTP_PORT)
+from utils.logger import system_logger
+
+
+def parse_time(text):
+    """把 "HH:MM" 转换为当天的分钟数，格式错误时抛出 ValueError"""
+    hour, _, minute = text.strip().partition(':')
+    hour, minute = int(hour), int(minute or 0)
+    if not (0 <= hour <= 24 and 0 <= minute < 60) or hour * 60 + minute > 24 * 60:
+        raise ValueError(f"无效的时间: {text}")
+    return hour * 60 + minute
+
+
+def server_key(server):
+    """限速配置中的服务器名统一为 "地址:端口"，只写地址时使用默认端口"""
+    server = server.strip()
+    return server if ':' in server else f"{server}:{DEFAULT_FTP_PORT}"
+
+
+def normalize_server_limits(limits):
+    """{服务器: 限速} 的服务器名统一为 地址:端口"""
+    return {server_key(server): rate for server, rate in limits.items()}
+
+
+def active_profile(profiles, now=None):
+    """返回当前时间所在时段的配置，没有时返回 None
+
+    结束时间早于开始时间的时段跨越午夜，例如 22:00-06:00。
+    """
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    for profile in profiles:
+        try:
+            start, end = parse_time(profile['start']), parse_time(profile['end'])
+        except (KeyError, ValueError):
+            continue
+        if start <= end:
+            if start <= minute < end:
+                return profile
+        elif minute >= start or minute < end:
+            return profile
+    return None
+
+
+class TokenBucket:
+    """令牌桶限速，rate 为每秒字节数，0 表示不限速
+
+    发送后再扣除令牌，令牌不足时允许透支，由调用方等待透支部分补足所需的时间，
+    这样每次发送只需要一次加锁计算，多个线程共用时总速率仍然不超过 rate。
+    """
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self._tokens = rate * BANDWIDTH_BURST_SECONDS
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        """修改限速，立即生效"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self._tokens = min(self._tokens, rate * BANDWIDTH_BURST_SECONDS)
+
+    def consume(self, nbytes):
+        """扣除已发送的字节数，返回需要等待的秒数"""
+        if not self.rate:
+            return 0
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= nbytes
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def _refill(self, now):
+        if self.rate:
+            self._tokens = min(self.rate * BANDWIDTH_BURST_SECONDS,
+                               self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+
+class BandwidthLimiter:
+    """按任务、FTP服务器和全局三级限速
+
+    限速配置来自 config/settings.json 的 bandwidth 部分（单位为字节/秒，0 表示不限速）：
+    global_limit、server_limits（"地址:端口" -> 限速，与 FTPConnectionPool.server_of 一致）
+    和 profiles（时段配置）。
+    任务的限速为任务的 rate_limit。当前时间落在某个时段内时，
+    该时段配置的 global_limit、server_limits 和 task_limits 覆盖对应的设置。
+    """
+
+    def __init__(self, settings=None):
+        self._lock = threading.Lock()
+        self._settings = {}
+        self._global = TokenBucket()
+        self._servers = {}  # "地址:端口" -> TokenBucket
+        self._tasks = {}  # task_name -> TokenBucket
+        self._server_limits = {}
+        self._task_limits = {}
+        self._profile = None
+        self._next_check = 0
+        self.configure(settings or {})
+
+    def configure(self, settings):
+        """更新限速配置，正在进行的传输立即按新配置限速"""
+        with self._lock:
+            self._settings = dict(settings)
+            self._next_check = 0
+
+    def chunk_size(self, task):
+        """限速时每次发送的最大字节数，不限速时返回 None
+
+        每次发送的数据不超过令牌桶的容量，避免一次发送大块数据后长时间等待。
+        """
+        rates = [rate for rate in self._limits(task) if rate]
+        if not rates:
+            return None
+        return max(BANDWIDTH_MIN_CHUNK, int(min(rates) * BANDWIDTH_BURST_SECONDS))
+
+    def throttle(self, task, nbytes):
+        """记录任务发送的字节数，超过限速时等待"""
+        task_rate, server_rate, global_rate = self._limits(task)
+        if not (task_rate or server_rate or global_rate):
+            return
+        wait = self._global.consume(nbytes)
+        if server_rate:
+            wait = max(wait, self._bucket(self._servers, FTPConnectionPool.server_of(task),
+                                          server_rate).consume(nbytes))
+        if task_rate:
+            wait = max(wait, self._bucket(self._tasks, task.name, task_rate).consume(nbytes))
+        if wait > 0:
+            time.sleep(wait)
+
+    def forget_task(self, task_name):
+        """删除任务的令牌桶"""
+        with self._lock:
+            self._tasks.pop(task_name, None)
+
+    def _limits(self, task):
+        """返回 (任务, 服务器, 全局) 当前的限速"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._refresh(now)
+        task_rate = self._task_limits.get(task.name, task.rate_limit)
+        server_rate = self._server_limits.get(FTPConnectionPool.server_of(task), 0)
+        return task_rate, server_rate, self._global.rate
+
+    def _refresh(self, now):
+        """按当前时段计算生效的限速"""
+        with self._lock:
+            settings = self._settings
+            profile = active_profile(settings.get('profiles', []))
+            global_rate = settings.get('global_limit', 0)
+            server_limits = normalize_server_limits(settings.get('server_limits', {}))
+            task_limits = {}
+            if profile is not None:
+                global_rate = profile.get('global_limit', global_rate)
+                server_limits.update(normalize_server_limits(profile.get('server_limits', {})))
+                task_limits = dict(profile.get('task_limits', {}))
+            if profile is not self._profile:
+                name = f"{profile['start']}-{profile['end']}" if profile else "默认"
+                system_logger.logger.info(f"带宽限制切换为时段配置: {name}")
+                self._profile = profile
+            self._server_limits = server_limits
+            self._task_limits = task_limits
+            if self._global.rate != global_rate:
+                self._global.set_rate(global_rate)
+            self._next_check = now + BANDWIDTH_PROFILE_CHECK_INTERVAL
+
+    def _bucket(self, buckets, key, rate):
+        bucket = buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = buckets.setdefault(key, TokenBucket(rate))
+        if bucket.rate != rate:
+            bucket.set_rate(rate)
+        return bucket
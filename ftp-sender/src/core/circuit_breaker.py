@@ -0,0 +1,138 @@
+import ftplib
+import random
+import threading
+import time
+from utils.constants import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BASE_DELAY, CIRCUIT_MAX_DELAY
+from utils.logger import system_logger
+
+# 熔断器状态
+STATE_CLOSED = "closed"        # 正常
+STATE_OPEN = "open"            # 熔断中，不连接服务器
+STATE_HALF_OPEN = "half_open"  # 正在用一次上传试探服务器是否恢复
+
+# 视为服务器不可用的错误：网络错误、连接断开和 4xx 临时错误
+CONNECTION_ERRORS = (OSError, EOFError, ftplib.error_temp)
+
+
+class _Breaker:
+    """一个FTP服务器的熔断状态"""
+
+    def __init__(self):
+        self.state = STATE_CLOSED
+        self.failures = 0  # 连续失败次数
+        self.trips = 0  # 连续熔断次数，决定试探前的等待时间
+        self.retry_at = 0.0
+
+
+class CircuitBreakers:
+    """按FTP服务器的熔断器，连接同一服务器的所有任务共用
+
+    连续 threshold 次连接失败后熔断，熔断期间上传在调度队列中等待，不尝试连接。
+    等待时间（指数增长并加入随机抖动）结束后只放行一次上传作为试探，
+    成功则恢复正常，失败则重新熔断并加倍等待时间。
+    状态变化时调用 on_change()，调度器据此重新调度等待中的上传。
+    """
+
+    def __init__(self, on_change=None, threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 base_delay=CIRCUIT_BASE_DELAY, max_delay=CIRCUIT_MAX_DELAY):
+        self.on_change = on_change
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._breakers = {}  # 服务器 -> _Breaker
+        self._timers = {}  # 服务器 -> 等待结束时唤醒调度的 Timer
+
+    def available(self, server):
+        """服务器当前是否可以开始上传（不改变状态，供调度器判断）"""
+        with self._lock:
+            breaker = self._breakers.get(server)
+            if breaker is None or breaker.state == STATE_CLOSED:
+                return True
+            return breaker.state == STATE_OPEN and time.monotonic() >= breaker.retry_at
+
+    def is_open(self, server):
+        """服务器是否处于熔断中（含试探中）"""
+        with self._lock:
+            breaker = self._breakers.get(server)
+            return breaker is not None and breaker.state != STATE_CLOSED
+
+    def allow(self, server):
+        """连接服务器前调用，返回是否允许连接
+
+        熔断等待结束后第一个调用者获得试探机会，之后必须调用 record_success 或 record_failure。
+        """
+        with self._lock:
+            breaker = self._breakers.get(server)
+            if breaker is None or breaker.state == STATE_CLOSED:
+                return True
+            if breaker.state == STATE_OPEN and time.monotonic() >= breaker.retry_at:
+                breaker.state = STATE_HALF_OPEN
+                return True
+            return False
+
+    def record_success(self, server):
+        """与服务器的通信成功（包括服务器返回的非连接类错误）"""
+        with self._lock:
+            breaker = self._breakers.pop(server, None)
+            timer = self._timers.pop(server, None)
+        if timer is not None:
+            timer.cancel()
+        if breaker is not None and breaker.state != STATE_CLOSED:
+            system_logger.logger.info(f"FTP服务器 {server} 已恢复")
+            self._notify()
+
+    def record_failure(self, server):
+        """与服务器的连接失败"""
+        with self._lock:
+            breaker = self._breakers.setdefault(server, _Breaker())
+            breaker.failures += 1
+            if breaker.state == STATE_CLOSED and breaker.failures < self.threshold:
+                return
+            if breaker.state == STATE_OPEN:
+                # 熔断前已开始的上传失败，不延长等待
+                return
+            breaker.state = STATE_OPEN
+            breaker.trips += 1
+            delay = min(self.max_delay, self.base_delay * 2 ** (breaker.trips - 1))
+            # 随机抖动，避免多个服务器或多个程序实例同时试探
+            delay = random.uniform(delay / 2, delay)
+            breaker.retry_at = time.monotonic() + delay
+            old = self._timers.pop(server, None)
+            timer = self._timers[server] = threading.Timer(delay, self._notify)
+            timer.daemon = True
+            timer.start()
+        if old is not None:
+            old.cancel()
+        system_logger.logger.warning(
+            f"FTP服务器 {server} 连续 {breaker.failures} 次连接失败，{delay:.0f} 秒内暂停上传")
+        self._notify()
+
+    def state(self, server):
+        """服务器的熔断状态"""
+        with self._lock:
+            breaker = self._breakers.get(server)
+            return breaker.state if breaker else STATE_CLOSED
+
+    def snapshot(self):
+        """所有非正常状态服务器的 {服务器: {'state', 'failures', 'retry_in'}}"""
+        now = time.monotonic()
+        with self._lock:
+            return {server: {'state': breaker.state, 'failures': breaker.failures,
+                             'retry_in': max(0.0, breaker.retry_at - now)}
+                    for server, breaker in self._breakers.items()}
+
+    def stop(self):
+        """取消所有等待中的唤醒"""
+        with self._lock:
+            timers = list(self._timers.values())
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+
+    def _notify(self):
+        if self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception as e:
+                system_logger.logger.error(f"处理服务器状态变化时出错: {str(e)}")
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from utils.constants import DEDUP_CACHE_DIR, DEDUP_CACHE_SIZE, DEDUP_CACHE_SAVE_EVERY
+
+
+class DedupCache:
+    """内容去重缓存
+
+    记录每个远程文件名最近一次成功上传的大小和内容哈希，
+    同名且内容完全相同的文件不再重复发送。大小不同时无需计算哈希，
+    超过 max_entries 时淘汰最久未使用的记录，缓存保存在 config/dedup_cache 下。
+    """
+
+    def __init__(self, task_name, cache_dir=DEDUP_CACHE_DIR, max_entries=DEDUP_CACHE_SIZE):
+        self.cache_file = os.path.join(cache_dir, f"{task_name}.json")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # filename -> [size, content_hash]
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._entries = OrderedDict(json.load(f).get('files', []))
+        except Exception:
+            # 缓存损坏时重新建立，最多导致文件被重新发送一次
+            self._entries = OrderedDict()
+
+    def is_duplicate(self, filename, size, compute_hash):
+        """判断文件是否与上次成功上传的内容相同
+
+        compute_hash() 只在大小相同时才会调用。
+        """
+        with self._lock:
+            entry = self._entries.get(filename)
+        if entry is None or entry[0] != size:
+            return False
+        if compute_hash() != entry[1]:
+            return False
+        with self._lock:
+            if filename in self._entries:
+                self._entries.move_to_end(filename)
+        return True
+
+    def record(self, filename, size, content_hash):
+        """记录文件上传成功后的大小和内容哈希"""
+        with self._lock:
+            self._entries[filename] = [size, content_hash]
+            self._entries.move_to_end(filename)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._unsaved += 1
+            save = self._unsaved >= DEDUP_CACHE_SAVE_EVERY
+        if save:
+            self.save()
+
+    def save(self):
+        """有变化时写入缓存文件"""
+        with self._lock:
+            if not self._unsaved:
+                return
+            # 按使用顺序保存，加载后保持LRU顺序
+            data = {'files': list(self._entries.items())}
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def delete(self):
+        """删除缓存文件"""
+        with self._lock:
+            self._entries = OrderedDict()
+            self._unsaved = 0
+        if os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
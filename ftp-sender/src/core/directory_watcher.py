@@ -0,0 +1,106 @@
+import os
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from utils.logger import system_logger
+
+
+class _DirectoryDispatcher(FileSystemEventHandler):
+    """把一个目录的事件分发给监控该目录的所有任务"""
+
+    def __init__(self, watcher, key):
+        self.watcher = watcher
+        self.key = key
+
+    def dispatch(self, event):
+        for task_name, handler in self.watcher._handlers_for(self.key):
+            try:
+                handler.dispatch(event)
+            except Exception as e:
+                system_logger.logger.error(f"任务 {task_name} 处理文件事件时出错: {str(e)}")
+
+
+class DirectoryWatcher:
+    """所有即时任务共用的目录监控
+
+    只使用一个 Observer，每个不同的目录只注册一次监控，
+    事件按目录查表分发给对应的任务，任务增减时只添加或移除相应的监控。
+    目录上有任务需要包含子目录时使用递归监控，不包含子目录的任务由事件处理器自行过滤。
+    """
+
+    def __init__(self):
+        self._observer = Observer()
+        self._observer.daemon = True
+        # Observer 分发事件时持有自身的锁，_lock 只保护分发表，
+        # 调用 schedule/unschedule 时不能持有 _lock，否则会与分发线程死锁
+        self._lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+        self._handlers = {}  # 目录 -> {task_name: handler}
+        self._watches = {}  # 目录 -> ObservedWatch
+        self._paths = {}  # 目录 -> 注册监控时使用的路径
+        self._tasks = {}  # task_name -> (目录, 是否包含子目录)
+        self._observer.start()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def add(self, task_name, path, handler, recursive=False):
+        """监控任务的目录，同一目录的多个任务共用一个监控"""
+        key = self._key(path)
+        with self._watch_lock:
+            self._remove(task_name)
+            with self._lock:
+                self._handlers.setdefault(key, {})[task_name] = handler
+            self._tasks[task_name] = (key, recursive)
+            self._paths.setdefault(key, path)
+            try:
+                self._sync_watch(key)
+            except Exception:
+                self._remove(task_name)
+                raise
+
+    def remove(self, task_name):
+        """停止任务的监控，目录不再有任务时移除监控"""
+        with self._watch_lock:
+            self._remove(task_name)
+
+    def stop(self):
+        """停止监控线程"""
+        self._observer.stop()
+        self._observer.join(timeout=1)
+
+    def _remove(self, task_name):
+        entry = self._tasks.pop(task_name, None)
+        if entry is None:
+            return
+        key = entry[0]
+        with self._lock:
+            handlers = self._handlers.get(key, {})
+            handlers.pop(task_name, None)
+            if not handlers:
+                self._handlers.pop(key, None)
+        self._sync_watch(key)
+
+    def _sync_watch(self, key):
+        """按目录上的任务添加、移除或切换为递归监控"""
+        wanted = [recursive for k, recursive in self._tasks.values() if k == key]
+        recursive = any(wanted)
+        watch = self._watches.get(key)
+        if watch is not None and (not wanted or watch.is_recursive != recursive):
+            del self._watches[key]
+            try:
+                self._observer.unschedule(watch)
+            except (KeyError, OSError):
+                # 目录已被删除时监控可能已经失效
+                pass
+            watch = None
+        if not wanted:
+            self._paths.pop(key, None)
+        elif watch is None:
+            self._watches[key] = self._observer.schedule(
+                _DirectoryDispatcher(self, key), self._paths[key], recursive=recursive)
+
+    def _handlers_for(self, key):
+        with self._lock:
+            return list(self._handlers.get(key, {}).items())
@@ -0,0 +1,131 @@
+import heapq
+import itertools
+import threading
+import time
+from utils.constants import EVENT_DEBOUNCE_MAX_DELAY
+from utils.logger import system_logger
+
+# 文件事件类型
+EVENT_DETECTED = "detected"  # 新文件，需要等待写入完成
+EVENT_READY = "ready"        # 文件已确定写入完成（标记文件或改名）
+EVENT_MODIFIED = "modified"
+EVENT_CLOSED = "closed"
+EVENT_DELETED = "deleted"    # 文件被删除或移出监控目录
+
+
+class FileEvents:
+    """一个文件在合并窗口内的事件汇总"""
+
+    def __init__(self, task, path, now):
+        self.task = task
+        self.path = path
+        self.first_time = now
+        self.last_time = now
+        self.detected = False
+        self.ready = False
+        self.modified = False
+        self.closed = False
+        self.forget = False  # 需要取消之前的写入完成检测
+
+    def merge(self, action):
+        if action == EVENT_DELETED:
+            # 上传前被删除的文件，之前的事件全部丢弃
+            self.detected = self.ready = self.modified = self.closed = False
+            self.forget = True
+        elif action == EVENT_DETECTED:
+            self.detected = True
+            self.closed = False
+        elif action == EVENT_READY:
+            self.ready = True
+        elif action == EVENT_MODIFIED:
+            self.modified = True
+            self.closed = False
+        elif action == EVENT_CLOSED:
+            self.closed = True
+
+    def deadline(self, window, max_delay):
+        return min(self.last_time + window, self.first_time + max_delay)
+
+
+class EventDebouncer:
+    """文件事件合并
+
+    同一文件在任务的合并窗口内的创建、修改、移动和删除事件合并为一条，
+    文件在窗口内没有新事件（或等待超过最长时间）后与其他到期的文件一起批量交给 on_batch，
+    大量文件同时写入时避免逐个事件处理和重复上传。
+    """
+
+    def __init__(self, on_batch, max_delay=EVENT_DEBOUNCE_MAX_DELAY):
+        self.on_batch = on_batch  # on_batch([FileEvents])
+        self.max_delay = max_delay
+        self._pending = {}  # (task_name, path) -> FileEvents
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-debouncer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add(self, task, path, action):
+        """记录文件事件，可在任意线程调用"""
+        key = (task.name, path)
+        now = time.monotonic()
+        with self._cond:
+            item = self._pending.get(key)
+            if item is None:
+                item = self._pending[key] = FileEvents(task, path, now)
+                # 每个文件只有一个堆条目，到期时如有新事件再顺延
+                heapq.heappush(self._heap, (now + task.debounce_window, next(self._seq), item))
+                self._cond.notify()
+            item.task = task
+            item.last_time = now
+            item.merge(action)
+
+    def forget_task(self, task_name):
+        """丢弃任务尚未处理的事件"""
+        with self._cond:
+            for key in [k for k in self._pending if k[0] == task_name]:
+                del self._pending[key]
+
+    def stop(self):
+        """停止合并线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = []
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    # 取出所有已到期的文件
+                    now = time.monotonic()
+                    while self._heap and self._heap[0][0] <= now:
+                        _, _, item = heapq.heappop(self._heap)
+                        key = (item.task.name, item.path)
+                        if self._pending.get(key) is not item:
+                            continue
+                        deadline = item.deadline(item.task.debounce_window, self.max_delay)
+                        if deadline > now:
+                            heapq.heappush(self._heap, (deadline, next(self._seq), item))
+                            continue
+                        del self._pending[key]
+                        batch.append(item)
+                    if batch:
+                        break
+                if not self._running:
+                    return
+
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                system_logger.logger.error(f"处理文件事件时出错: {str(e)}")
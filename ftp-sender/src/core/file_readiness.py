@@ -0,0 +1,173 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from utils.constants import (READINESS_INITIAL_INTERVAL, READINESS_MAX_INTERVAL,
+                             READINESS_STABLE_CHECKS)
+from utils.logger import system_logger
+
+
+class _PendingFile:
+    """等待写入完成的文件"""
+
+    def __init__(self, task, filename, path, not_before):
+        self.task = task
+        self.filename = filename
+        self.path = path
+        self.not_before = not_before
+        self.last_state = None
+        self.stable_checks = 0
+        self.interval = READINESS_INITIAL_INTERVAL
+        self.closed = False
+        self.version = 0  # 每次重新安排检查时递增，用于丢弃过期的堆条目
+
+
+class FileReadinessTracker:
+    """文件写入完成检测
+
+    轮询文件的大小和修改时间，连续多次不变且文件未被占用时认为写入完成。
+    文件仍在变化时轮询间隔按倍数增长，收到文件关闭事件时立即检查。
+    所有任务共用一个检测线程，按下一次检查时间排序。
+    """
+
+    def __init__(self, on_ready):
+        self.on_ready = on_ready  # on_ready(task, filename)
+        self._pending = {}  # (task_name, path) -> _PendingFile
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="file-readiness")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def watch(self, task, path, min_delay=0):
+        """开始检测文件，min_delay 秒内不会判定为完成"""
+        key = (task.name, path)
+        with self._cond:
+            item = self._pending.get(key)
+            if item is not None:
+                self._reset(item)
+                return
+            not_before = time.monotonic() + (min_delay or 0)
+            item = _PendingFile(task, task.relative_name(path), path, not_before)
+            self._pending[key] = item
+            self._schedule(item, max(not_before, time.monotonic() + item.interval))
+
+    def touch(self, task, path):
+        """文件被修改，重新计算稳定次数"""
+        with self._cond:
+            item = self._pending.get((task.name, path))
+            if item:
+                self._reset(item)
+
+    def mark_closed(self, task, path):
+        """文件写入句柄已关闭，尽快检查"""
+        with self._cond:
+            item = self._pending.get((task.name, path))
+            if item:
+                item.closed = True
+                self._schedule(item, max(item.not_before, time.monotonic()))
+
+    def forget(self, task, path):
+        """文件已删除或移走，不再检测"""
+        with self._cond:
+            self._pending.pop((task.name, path), None)
+
+    def forget_task(self, task_name):
+        """停止检测任务的所有文件"""
+        with self._cond:
+            for key in [k for k in self._pending if k[0] == task_name]:
+                del self._pending[key]
+
+    def stop(self):
+        """停止检测线程"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=1)
+
+    def _reset(self, item):
+        item.stable_checks = 0
+        item.closed = False
+
+    def _schedule(self, item, when):
+        item.version += 1
+        heapq.heappush(self._heap, (when, next(self._seq), item, item.version))
+        self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    when, _, item, version = self._heap[0]
+                    delay = when - time.monotonic()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    heapq.heappop(self._heap)
+                    key = (item.task.name, item.path)
+                    if self._pending.get(key) is item and item.version == version:
+                        break
+                if not self._running:
+                    return
+
+            ready = self._check(item)
+
+            with self._cond:
+                if self._pending.get(key) is not item or item.version != version:
+                    # 检查期间收到了新的事件
+                    continue
+                if ready is None:
+                    del self._pending[key]
+                    continue
+                if ready:
+                    del self._pending[key]
+                else:
+                    self._schedule(item, time.monotonic() + item.interval)
+                    continue
+
+            try:
+                self.on_ready(item.task, item.filename)
+            except Exception as e:
+                system_logger.logger.error(f"提交上传 {item.path} 时出错: {str(e)}")
+
+    def _check(self, item):
+        """检查文件是否写入完成，文件不存在时返回 None"""
+        try:
+            stat = os.stat(item.path)
+        except FileNotFoundError:
+            return None
+        except OSError:
+            return False
+
+        if item.closed:
+            # 写入句柄已关闭，无需再等待稳定
+            return not _is_file_locked(item.path)
+
+        state = (stat.st_size, stat.st_mtime_ns)
+        if state != item.last_state:
+            if item.last_state is not None:
+                # 文件仍在变化，延长下一次检查的间隔
+                item.interval = min(item.interval * 2, READINESS_MAX_INTERVAL)
+            item.last_state = state
+            item.stable_checks = 0
+            return False
+
+        item.stable_checks += 1
+        if item.stable_checks < READINESS_STABLE_CHECKS:
+            return False
+        return not _is_file_locked(item.path)
+
+
+def _is_file_locked(path):
+    """检查文件是否被其他进程独占（Windows下写入中的文件无法打开）"""
+    try:
+        with open(path, 'rb'):
+            return False
+    except OSError:
+        return True
@@ -0,0 +1,237 @@
+import ftplib
+import socket
+import threading
+import time
+from collections import defaultdict
+from utils.constants import (FTP_CONNECT_TIMEOUT, FTP_POOL_MAX_PER_SERVER,
+                             FTP_POOL_IDLE_TIMEOUT)
+
+
+class PooledConnection:
+    """连接池中的一个已登录FTP会话"""
+
+    def __init__(self, key, ftp):
+        self.key = key
+        self.ftp = ftp
+        self.last_used = time.monotonic()
+        self.reused = False  # 是否为复用的会话
+
+
+class FTPConnectionPool:
+    """FTP连接池
+
+    按 (ftp_address, port, username, remote_dir) 缓存已登录并切换好目录的会话，
+    复用前通过NOOP检查会话是否可用，空闲超时的会话会被回收，
+    同一服务器的连接总数不超过 max_per_server。
+    """
+
+    def __init__(self, max_per_server=FTP_POOL_MAX_PER_SERVER,
+                 idle_timeout=FTP_POOL_IDLE_TIMEOUT, timeout=FTP_CONNECT_TIMEOUT):
+        self.max_per_server = max_per_server
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle = defaultdict(list)         # key -> [PooledConnection]
+        self._server_counts = defaultdict(int)  # 服务器 -> 已打开的连接数
+        self._remote_dirs = defaultdict(set)    # key -> 已确认存在的远程子目录
+        self._closed = False
+
+    @staticmethod
+    def make_key(task):
+        """生成连接池键"""
+        return (task.ftp_address, task.port, task.username, task.remote_dir)
+
+    @staticmethod
+    def _server_of(key):
+        return f"{key[0]}:{key[1]}"
+
+    @classmethod
+    def server_of(cls, task):
+        """任务所连接的FTP服务器，同一服务器的任务共用连接数上限和服务器状态"""
+        return cls._server_of(cls.make_key(task))
+
+    def acquire(self, task, wait=True):
+        """获取一个可用的FTP会话，优先复用空闲会话
+
+        wait 为假时，同一服务器连接数已满则立即返回 None。
+        """
+        key = self.make_key(task)
+        server = self._server_of(key)
+
+        while True:
+            conn = None
+            opening = False
+            with self._cond:
+                if self._closed:
+                    raise Exception("FTP连接池已关闭")
+                expired = self._evict_idle_locked()
+
+                if self._idle.get(key):
+                    conn = self._idle[key].pop()
+                else:
+                    if self._server_counts[server] >= self.max_per_server:
+                        expired.extend(self._evict_other_key_locked(key))
+                    if self._server_counts[server] < self.max_per_server:
+                        self._server_counts[server] += 1
+                        opening = True
+                    elif wait and not expired:
+                        # 同一服务器连接数已满，等待其他会话归还
+                        self._cond.wait(self.timeout)
+            self._close_all_quietly(expired)
+
+            if not wait and conn is None and not opening:
+                return None
+            if opening:
+                return self._open(task, key)
+            if conn is None:
+                continue
+            if self._is_alive(conn):
+                conn.reused = True
+                conn.ftp.set_pasv(task.passive_mode)
+                return conn
+            self.discard(conn)
+
+    def release(self, conn):
+        """归还会话到连接池"""
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._server_counts[self._server_of(conn.key)] -= 1
+            else:
+                conn.last_used = time.monotonic()
+                self._idle[conn.key].append(conn)
+                self._cond.notify()
+        if closed:
+            self._close_quietly(conn)
+
+    def discard(self, conn):
+        """丢弃失效或状态未知的会话"""
+        self._close_quietly(conn)
+        with self._cond:
+            self._server_counts[self._server_of(conn.key)] -= 1
+            # 出错可能是远程目录被删除，下次重新确认
+            self._remote_dirs.pop(conn.key, None)
+            self._cond.notify()
+
+    def ensure_dirs(self, conn, remote_dir):
+        """确保会话当前目录下的子目录存在（/ 分隔），只为未确认过的目录发送MKD"""
+        if not remote_dir:
+            return
+        with self._cond:
+            known = self._remote_dirs[conn.key]
+            if remote_dir in known:
+                return
+            known = set(known)
+
+        path = ''
+        created = []
+        for part in remote_dir.split('/'):
+            path = f'{path}/{part}' if path else part
+            if path in known:
+                continue
+            try:
+                conn.ftp.mkd(path)
+            except ftplib.error_perm:
+                # 目录已存在，无权限时后续上传会失败
+                pass
+            created.append(path)
+
+        with self._cond:
+            self._remote_dirs[conn.key].update(created)
+
+    def evict_idle(self):
+        """回收空闲超时的会话"""
+        with self._cond:
+            expired = self._evict_idle_locked()
+        self._close_all_quietly(expired)
+
+    def close_all(self):
+        """关闭连接池中的所有空闲会话"""
+        with self._cond:
+            self._closed = True
+            idle = []
+            for key, conns in self._idle.items():
+                idle.extend(conns)
+                self._server_counts[self._server_of(key)] -= len(conns)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_all_quietly(idle)
+
+    def _open(self, task, key):
+        """新建并登录一个FTP会话"""
+        ftp = ftplib.FTP(timeout=self.timeout)
+        try:
+            ftp.connect(task.ftp_address, task.port)
+            ftp.set_pasv(task.passive_mode)
+            if task.tcp_nodelay:
+                # 控制连接上的命令都很短，关闭Nagle算法减少往返延迟
+                ftp.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                ftp.login(task.username, task.password)
+            except ftplib.error_perm as e:
+                raise Exception(f"FTP登录失败: {str(e)}")
+
+            try:
+                ftp.cwd(task.remote_dir)
+            except ftplib.error_perm as e:
+                raise Exception(f"切换远程目录失败: {str(e)}")
+        except Exception:
+            self._close_quietly_ftp(ftp)
+            with self._cond:
+                self._server_counts[self._server_of(key)] -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(key, ftp)
+
+    def _is_alive(self, conn):
+        """通过NOOP检查会话是否仍然可用"""
+        try:
+            conn.ftp.voidcmd('NOOP')
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self):
+        """移出空闲超时的会话，返回待关闭的会话列表"""
+        now = time.monotonic()
+        expired = []
+        for key in list(self._idle.keys()):
+            alive = []
+            for conn in self._idle[key]:
+                if now - conn.last_used > self.idle_timeout:
+                    expired.append(conn)
+                    self._server_counts[self._server_of(key)] -= 1
+                else:
+                    alive.append(conn)
+            if alive:
+                self._idle[key] = alive
+            else:
+                del self._idle[key]
+        return expired
+
+    def _evict_other_key_locked(self, key):
+        """同一服务器连接已满时，移出一个其他用户/目录的空闲会话腾出名额"""
+        server = self._server_of(key)
+        for other_key, conns in self._idle.items():
+            if other_key != key and self._server_of(other_key) == server and conns:
+                conn = conns.pop(0)
+                self._server_counts[server] -= 1
+                return [conn]
+        return []
+
+    def _close_all_quietly(self, conns):
+        for conn in conns:
+            self._close_quietly(conn)
+
+    def _close_quietly(self, conn):
+        self._close_quietly_ftp(conn.ftp)
+
+    @staticmethod
+    def _close_quietly_ftp(ftp):
+        try:
+            ftp.quit()
+        except Exception:
+            try:
+                ftp.close()
+            except Exception:
+                pass
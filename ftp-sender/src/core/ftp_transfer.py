@@ -0,0 +1,253 @@
+import ftplib
+import os
+import socket
+from utils.constants import (AUTO_BLOCKSIZE_STEPS, AUTO_SNDBUF_MIN_FILE_SIZE, AUTO_SNDBUF_SIZE,
+                             SENDFILE_CHUNK_SIZE)
+
+try:
+    import ssl
+    _SSLSocket = ssl.SSLSocket
+except ImportError:
+    _SSLSocket = None
+
+
+class ResumeNotSupported(Exception):
+    """服务器不支持断点续传"""
+
+
+class SizeMismatchError(Exception):
+    """上传后远程文件大小与本地不一致"""
+
+
+class ChecksumMismatchError(Exception):
+    """上传后远程文件校验值与本地不一致"""
+
+
+# 各算法在 HASH 命令中的名称、对应的扩展命令和十六进制校验值长度
+_HASH_NAMES = {'crc32': 'CRC32', 'md5': 'MD5', 'sha256': 'SHA-256'}
+_X_COMMANDS = {'crc32': 'XCRC', 'md5': 'XMD5', 'sha256': 'XSHA256'}
+_DIGEST_LENGTHS = {'crc32': 8, 'md5': 32, 'sha256': 64}
+
+
+def remote_size(ftp, remote_name):
+    """获取远程文件大小，文件不存在或服务器不支持SIZE时返回 None"""
+    try:
+        ftp.voidcmd('TYPE I')
+        return ftp.size(remote_name)
+    except ftplib.error_perm:
+        return None
+
+
+def transfer_tuning(task, file_size):
+    """根据任务配置和文件大小确定传输块大小和发送缓冲区大小
+
+    配置为0时自动选择：文件越大块越大，大文件使用较大的发送缓冲区。
+    """
+    blocksize = task.transfer_blocksize
+    if not blocksize:
+        for max_size, size in AUTO_BLOCKSIZE_STEPS:
+            blocksize = size
+            if file_size < max_size:
+                break
+
+    sndbuf = task.socket_sndbuf
+    if not sndbuf and file_size >= AUTO_SNDBUF_MIN_FILE_SIZE:
+        sndbuf = AUTO_SNDBUF_SIZE
+    return blocksize, sndbuf
+
+
+def store(ftp, cmd, f, blocksize=8192, callback=None, rest=None, sndbuf=0, zero_copy=False,
+          limit=None, hasher=None, sendfile_chunk=SENDFILE_CHUNK_SIZE):
+    """与 ftplib.FTP.storbinary 相同，但可以设置数据连接的发送缓冲区
+
+    zero_copy 为真且系统支持 sendfile 时，由内核直接把文件写入数据连接，
+    不经过Python缓冲区，TLS连接始终使用普通读写。callback 参数为本次发送的字节数。
+    limit 不为 None 时最多发送 limit 字节后关闭数据连接（分段上传）。
+    传入 hasher 时用发送的数据更新哈希，此时不使用 sendfile，文件只读取一次。
+    sendfile_chunk 为每次 sendfile 的字节数，限速时应减小以便均匀发送。
+    """
+    ftp.voidcmd('TYPE I')
+    with ftp.transfercmd(cmd, rest) as conn:
+        if sndbuf:
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+        is_tls = _SSLSocket is not None and isinstance(conn, _SSLSocket)
+        if zero_copy and hasher is None and not is_tls and hasattr(os, 'sendfile'):
+            _send_with_sendfile(conn, f, callback, limit, sendfile_chunk)
+        else:
+            remaining = limit
+            while remaining is None or remaining > 0:
+                buf = f.read(blocksize if remaining is None else min(blocksize, remaining))
+                if not buf:
+                    break
+                conn.sendall(buf)
+                if hasher is not None:
+                    hasher.update(buf)
+                if remaining is not None:
+                    remaining -= len(buf)
+                if callback:
+                    callback(len(buf))
+        # FTP_TLS 需要关闭TLS层
+        if is_tls:
+            conn.unwrap()
+    return ftp.voidresp()
+
+
+def _send_with_sendfile(conn, f, callback, limit=None, chunk=SENDFILE_CHUNK_SIZE):
+    """分段调用 socket.sendfile，每段结束后按文件偏移量报告进度"""
+    offset = f.tell()
+    remaining = limit
+    while remaining is None or remaining > 0:
+        count = chunk if remaining is None else min(chunk, remaining)
+        sent = conn.sendfile(f, offset, count)
+        if not sent:
+            break
+        offset += sent
+        if remaining is not None:
+            remaining -= sent
+        if callback:
+            callback(sent)
+
+
+def upload(ftp, remote_name, f, offset=0, callback=None, blocksize=8192, sndbuf=0,
+           zero_copy=False, hasher=None, sendfile_chunk=SENDFILE_CHUNK_SIZE):
+    """从 offset 处开始上传文件
+
+    offset 大于0时先尝试 REST+STOR，服务器拒绝REST时改用 APPE，
+    两者都不支持时抛出 ResumeNotSupported，由调用方从头重新上传。
+    hasher 只在从头上传时使用。
+    """
+    if not offset:
+        f.seek(0)
+        return store(ftp, f'STOR {remote_name}', f, blocksize, callback,
+                     sndbuf=sndbuf, zero_copy=zero_copy, hasher=hasher,
+                     sendfile_chunk=sendfile_chunk)
+
+    try:
+        f.seek(offset)
+        return store(ftp, f'STOR {remote_name}', f, blocksize, callback, offset,
+                     sndbuf, zero_copy, sendfile_chunk=sendfile_chunk)
+    except ftplib.error_perm as e:
+        # REST被拒绝时数据连接尚未建立，可以安全地改用APPE
+        if not str(e).startswith(('500', '501', '502', '504')):
+            raise
+
+    try:
+        f.seek(offset)
+        return store(ftp, f'APPE {remote_name}', f, blocksize, callback,
+                     sndbuf=sndbuf, zero_copy=zero_copy, sendfile_chunk=sendfile_chunk)
+    except ftplib.error_perm as e:
+        if not str(e).startswith(('500', '501', '502', '504')):
+            raise
+        raise ResumeNotSupported(str(e))
+
+
+def upload_range(ftp, remote_name, f, offset, length, callback=None, blocksize=8192, sndbuf=0,
+                 zero_copy=False, sendfile_chunk=SENDFILE_CHUNK_SIZE):
+    """上传文件中从 offset 开始的 length 字节到远程文件的相同位置
+
+    offset 为0时使用普通 STOR（会截断远程文件），否则使用 REST+STOR。
+    服务器拒绝REST或不允许REST位置超过远程文件大小（554）时抛出 ResumeNotSupported。
+    """
+    f.seek(offset)
+    try:
+        return store(ftp, f'STOR {remote_name}', f, blocksize, callback, offset or None,
+                     sndbuf, zero_copy, length, sendfile_chunk=sendfile_chunk)
+    except ftplib.error_perm as e:
+        if offset and str(e).startswith(('500', '501', '502', '504', '554')):
+            raise ResumeNotSupported(str(e))
+        raise
+
+
+def upload_part(ftp, remote_name, f, offset, length, callback=None, blocksize=8192, sndbuf=0,
+                zero_copy=False, sendfile_chunk=SENDFILE_CHUNK_SIZE):
+    """把文件中从 offset 开始的 length 字节上传为一个单独的远程文件"""
+    f.seek(offset)
+    return store(ftp, f'STOR {remote_name}', f, blocksize, callback, None, sndbuf, zero_copy,
+                 length, sendfile_chunk=sendfile_chunk)
+
+
+def supports_command(ftp, command):
+    """服务器的 FEAT 应答中是否列出了 command，不支持 FEAT 时返回 False"""
+    try:
+        resp = ftp.sendcmd('FEAT')
+    except ftplib.error_perm:
+        return False
+    for line in resp.splitlines()[1:-1]:
+        fields = line.split()
+        if fields and fields[0].upper() == command:
+            return True
+    return False
+
+
+def combine(ftp, remote_name, part_names):
+    """用 COMB 命令把多个远程文件按顺序合并为 remote_name"""
+    names = ' '.join(f'"{name}"' for name in part_names)
+    return ftp.voidcmd(f'COMB "{remote_name}" {names}')
+
+
+def delete_quietly(ftp, remote_name):
+    """删除远程文件，文件不存在或没有权限时忽略"""
+    try:
+        ftp.delete(remote_name)
+    except ftplib.error_perm:
+        pass
+
+
+def publish(ftp, temp_name, remote_name):
+    """把临时文件改名为正式文件名（RNFR/RNTO）
+
+    目标文件已存在且服务器不允许覆盖时，删除目标后再改名一次。
+    """
+    try:
+        ftp.rename(temp_name, remote_name)
+    except ftplib.error_perm as e:
+        try:
+            ftp.delete(remote_name)
+        except ftplib.error_perm:
+            # 目标文件不存在，改名失败另有原因
+            raise e
+        ftp.rename(temp_name, remote_name)
+
+
+def list_names(ftp, path=''):
+    """列出远程目录下的文件名，空目录时部分服务器返回550，按空列表处理"""
+    try:
+        names = ftp.nlst(path) if path else ftp.nlst()
+    except ftplib.error_perm as e:
+        if str(e).startswith('550'):
+            return []
+        raise
+    return [name.rsplit('/', 1)[-1] for name in names]
+
+
+def remote_checksum(ftp, remote_name, algorithm):
+    """获取远程文件的校验值（小写十六进制）
+
+    先尝试 HASH 命令，再尝试 XCRC/XMD5/XSHA256，服务器都不支持时返回 None。
+    """
+    attempts = ((f'OPTS HASH {_HASH_NAMES[algorithm]}', f'HASH {remote_name}'),
+                (f'{_X_COMMANDS[algorithm]} {remote_name}',))
+    for commands in attempts:
+        try:
+            for cmd in commands:
+                resp = ftp.sendcmd(cmd)
+        except ftplib.error_perm as e:
+            if str(e).startswith(('500', '501', '502', '504')):
+                continue
+            raise
+        digest = _parse_digest(resp, _DIGEST_LENGTHS[algorithm])
+        if digest:
+            return digest
+    return None
+
+
+def _parse_digest(resp, length):
+    """从响应中找出指定长度的十六进制校验值"""
+    for token in resp.split()[1:]:
+        if len(token) == length:
+            try:
+                int(token, 16)
+            except ValueError:
+                continue
+            return token.lower()
+    return None
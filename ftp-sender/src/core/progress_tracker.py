@@ -0,0 +1,106 @@
+import itertools
+import threading
+import time
+from utils.constants import (PROGRESS_PUBLISH_INTERVAL_MS, PROGRESS_PUBLISH_STEP,
+                             PROGRESS_SPEED_SMOOTHING)
+
+
+class TransferProgress:
+    """单个文件传输的进度
+
+    add() 在每个数据块发送后调用，只做累加和比较，
+    距上次发布超过时间间隔或进度变化超过百分比步长时才生成快照。
+    """
+
+    def __init__(self, tracker, transfer_id, task_name, filename, total_size):
+        self.tracker = tracker
+        self.transfer_id = transfer_id
+        self.task_name = task_name
+        self.filename = filename
+        self.total_size = total_size
+        self.transferred = 0
+        self.speed = 0.0  # 字节/秒
+        self._interval = tracker.interval
+        self._step_bytes = max(1, total_size * tracker.step_percent // 100)
+        self._last_time = time.monotonic()
+        self._last_bytes = 0
+        self._publish()
+
+    def add(self, nbytes):
+        """累加已发送字节数"""
+        self.transferred += nbytes
+        if self.transferred - self._last_bytes >= self._step_bytes or \
+                time.monotonic() - self._last_time >= self._interval:
+            self._publish()
+
+    def reset(self, transferred):
+        """从指定位置重新开始计数（续传或重新上传时）"""
+        self.transferred = transferred
+        self._last_bytes = transferred
+        self._last_time = time.monotonic()
+        self._publish()
+
+    def _publish(self):
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        if elapsed > 0 and self.transferred > self._last_bytes:
+            rate = (self.transferred - self._last_bytes) / elapsed
+            if self.speed:
+                self.speed += PROGRESS_SPEED_SMOOTHING * (rate - self.speed)
+            else:
+                self.speed = rate
+        self._last_time = now
+        self._last_bytes = self.transferred
+
+        remaining = max(self.total_size - self.transferred, 0)
+        percentage = int(self.transferred * 100 / self.total_size) if self.total_size else 100
+        self.tracker._publish(self.transfer_id, {
+            'task_name': self.task_name,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'transferred': self.transferred,
+            'percentage': min(percentage, 100),
+            'speed': self.speed,
+            'eta': remaining / self.speed if self.speed else None,
+        })
+
+
+class ProgressTracker:
+    """传输进度汇总
+
+    各传输按时间间隔或进度步长合并更新，界面通过 snapshot() 定时读取最新状态，
+    每个传输只保留一份快照，不会随数据块数量增长。
+    """
+
+    def __init__(self, interval_ms=PROGRESS_PUBLISH_INTERVAL_MS, step_percent=PROGRESS_PUBLISH_STEP):
+        self.interval = interval_ms / 1000
+        self.step_percent = step_percent
+        self._ids = itertools.count(1)
+        self._snapshots = {}  # transfer_id -> 快照
+        self._lock = threading.Lock()
+
+    def start(self, task_name, filename, total_size):
+        """开始跟踪一个文件传输"""
+        return TransferProgress(self, next(self._ids), task_name, filename, total_size)
+
+    def finish(self, progress):
+        """传输结束，移除进度"""
+        with self._lock:
+            self._snapshots.pop(progress.transfer_id, None)
+
+    def snapshot(self):
+        """获取所有进行中传输的进度快照"""
+        with self._lock:
+            return list(self._snapshots.values())
+
+    def get(self, task_name):
+        """获取任务最近开始的传输进度"""
+        with self._lock:
+            for transfer_id in sorted(self._snapshots, reverse=True):
+                if self._snapshots[transfer_id]['task_name'] == task_name:
+                    return self._snapshots[transfer_id]
+        return None
+
+    def _publish(self, transfer_id, snapshot):
+        with self._lock:
+            self._snapshots[transfer_id] = snapshot
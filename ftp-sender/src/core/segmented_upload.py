@@ -0,0 +1,117 @@
+import ftplib
+import threading
+from core import ftp_transfer
+from utils.constants import SENDFILE_CHUNK_SIZE
+
+
+def split_ranges(total_size, count):
+    """把文件平均分成 count 段，返回 [(offset, length)]"""
+    size = total_size // count
+    ranges = []
+    for i in range(count):
+        offset = i * size
+        length = total_size - offset if i == count - 1 else size
+        ranges.append((offset, length))
+    return ranges
+
+
+def segment_count(task, total_size):
+    """文件可以分成的段数，不满足分段条件时返回1"""
+    if task.segment_count <= 1 or task.segment_min_size <= 0:
+        return 1
+    return max(1, min(task.segment_count, total_size // task.segment_min_size))
+
+
+def upload_segmented(pool, task, conn, remote_name, local_path, total_size, callback=None,
+                     chunk_size=None):
+    """用多个FTP会话并行上传一个大文件
+
+    服务器支持 COMB 时，各会话把一段数据上传为单独的分段文件（远程文件名加 .000、.001 等），
+    全部完成后合并为远程文件并删除分段文件。否则各会话通过 REST+STOR 把一段数据写入
+    远程文件的对应位置：第一段使用普通 STOR 创建（截断）远程文件，开始传输后其他段才开始，
+    避免被截断。不允许REST位置超过远程文件大小的服务器会拒绝后面的段（ResumeNotSupported）。
+    conn 由调用方管理，其余会话从连接池非阻塞获取，一个也获取不到时返回 False，
+    调用方应改用单连接上传。任何一段失败都会抛出异常，远程文件需要从头重新上传。
+    chunk_size 为限速时每次发送的最大字节数。
+    """
+    count = segment_count(task, total_size)
+    extra = []
+    while len(extra) < count - 1:
+        other = pool.acquire(task, wait=False)
+        if other is None:
+            break
+        extra.append(other)
+    if not extra:
+        return False
+
+    conns = [conn] + extra
+    ranges = split_ranges(total_size, len(conns))
+    parts = None
+    if ftp_transfer.supports_command(conn.ftp, 'COMB'):
+        parts = [f"{remote_name}.{index:03d}" for index in range(len(conns))]
+    blocksize, sndbuf = ftp_transfer.transfer_tuning(task, ranges[0][1])
+    sendfile_chunk = SENDFILE_CHUNK_SIZE
+    if chunk_size:
+        blocksize, sendfile_chunk = min(blocksize, chunk_size), min(sendfile_chunk, chunk_size)
+    started = threading.Event()
+    lock = threading.Lock()
+    errors = {}
+
+    def report(nbytes):
+        started.set()
+        if callback:
+            with lock:
+                callback(nbytes)
+
+    def run(index, ftp, offset, length):
+        try:
+            if parts:
+                with open(local_path, 'rb') as f:
+                    ftp_transfer.upload_part(ftp, parts[index], f, offset, length, report,
+                                             blocksize, sndbuf, task.zero_copy, sendfile_chunk)
+                return
+            if index:
+                started.wait()
+                if errors:
+                    return
+            with open(local_path, 'rb') as f:
+                ftp_transfer.upload_range(ftp, remote_name, f, offset, length, report,
+                                          blocksize, sndbuf, task.zero_copy, sendfile_chunk)
+        except Exception as e:
+            errors[index] = e
+            started.set()
+
+    threads = []
+    for index, (c, (offset, length)) in enumerate(zip(conns, ranges)):
+        thread = threading.Thread(target=run, args=(index, c.ftp, offset, length),
+                                  name=f"segment-{index}")
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    for index, c in enumerate(extra, start=1):
+        if index in errors:
+            pool.discard(c)
+        else:
+            pool.release(c)
+    if errors:
+        if parts and 0 not in errors:
+            _remove_parts(conn.ftp, parts)
+        raise errors[min(errors)]
+    if parts:
+        try:
+            ftp_transfer.combine(conn.ftp, remote_name, parts)
+        except ftplib.error_perm as e:
+            # 合并被拒绝时与不支持在指定位置写入相同，由调用方改用单连接上传
+            _remove_parts(conn.ftp, parts)
+            raise ftp_transfer.ResumeNotSupported(str(e))
+        # 部分服务器合并后保留分段文件
+        _remove_parts(conn.ftp, parts)
+    return True
+
+
+def _remove_parts(ftp, parts):
+    for name in parts:
+        ftp_transfer.delete_quietly(ftp, name)
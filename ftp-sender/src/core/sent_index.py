@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+from utils.constants import SENT_INDEX_DIR, SENT_INDEX_HASH_ALGORITHM
+from utils.file_hash import hash_file
+
+
+class SentFileIndex:
+    """已发送文件索引
+
+    记录每个任务已发送文件的大小、修改时间及可选的内容哈希，
+    定时扫描时只发送新增或发生变化的文件。索引保存在 config/sent_index 下。
+    """
+
+    def __init__(self, task_name, index_dir=SENT_INDEX_DIR, hash_cache=None):
+        self.index_file = os.path.join(index_dir, f"{task_name}.json")
+        self.hash_cache = hash_cache  # 按 (路径, 大小, 修改时间) 缓存的内容哈希
+        self._entries = {}  # filename -> [size, mtime_ns, content_hash]
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f).get('files', {})
+        except Exception:
+            # 索引损坏时重新建立，最多导致文件被重新发送一次
+            self._entries = {}
+
+    def is_unchanged(self, filename, size, mtime_ns, local_path=None):
+        """判断文件自上次发送后是否未变化
+
+        传入 local_path 时，大小相同但修改时间不同的文件会再比较内容哈希，
+        有哈希缓存时文件未再变化就不重新读取。
+        """
+        with self._lock:
+            entry = self._entries.get(filename)
+        if entry is None or entry[0] != size:
+            return False
+        if entry[1] == mtime_ns:
+            return True
+        if local_path is None or not entry[2]:
+            return False
+
+        if self.hash_cache is not None:
+            content_hash = self.hash_cache.compute(local_path, size, mtime_ns,
+                                                   SENT_INDEX_HASH_ALGORITHM)
+        else:
+            content_hash = hash_file(local_path, SENT_INDEX_HASH_ALGORITHM)
+        if content_hash != entry[2]:
+            return False
+        # 内容未变，只更新修改时间
+        with self._lock:
+            self._entries[filename] = [size, mtime_ns, entry[2]]
+            self._dirty = True
+        return True
+
+    def mark_sent(self, filename, size, mtime_ns, content_hash=None):
+        """记录文件已发送，size 和 mtime_ns 必须是发送的内容对应的状态
+
+        content_hash 为发送内容的 SENT_INDEX_HASH_ALGORITHM 哈希，不按哈希判断变化时为 None。
+        """
+        with self._lock:
+            self._entries[filename] = [size, mtime_ns, content_hash]
+            self._dirty = True
+
+    def prune(self, existing):
+        """移除本地已不存在的文件记录"""
+        with self._lock:
+            for filename in list(self._entries.keys()):
+                if filename not in existing:
+                    del self._entries[filename]
+                    self._dirty = True
+
+    def save(self):
+        """有变化时写入索引文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'files': dict(self._entries)}
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def delete(self):
+        """删除索引文件"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+        if os.path.exists(self.index_file):
+            os.remove(self.index_file)
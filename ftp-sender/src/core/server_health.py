@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from utils.constants import NETWORK_CHECK_INTERVAL, NETWORK_CHECK_TIMEOUT, NETWORK_RECHECK_INTERVAL
+from utils.logger import system_logger
+
+
+async def probe(host, port, timeout=NETWORK_CHECK_TIMEOUT):
+    """尝试建立TCP连接，返回连接耗时（秒），不可达时返回 None"""
+    start = time.monotonic()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    latency = time.monotonic() - start
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return latency
+
+
+class _ServerState:
+    def __init__(self):
+        self.reachable = True  # 检测前假定可达
+        self.latency = None
+        self.checked = None  # 上次检测时间（time.time()）
+        self.next_check = 0.0
+
+
+class ServerHealth:
+    """各FTP服务器的连通性和延迟
+
+    并发检测所有服务器，检测结果缓存供上传调度使用：不可达服务器的上传留在队列中，
+    不可达的服务器每 NETWORK_RECHECK_INTERVAL 秒重新检测一次，
+    可达的服务器每 NETWORK_CHECK_INTERVAL 秒检测一次。可达性变化时调用 on_change()。
+    """
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._states = {}  # 服务器 -> _ServerState
+
+    def reachable(self, server):
+        """服务器是否可达，尚未检测的服务器视为可达"""
+        with self._lock:
+            state = self._states.get(server)
+            return state is None or state.reachable
+
+    def all_reachable(self):
+        with self._lock:
+            return all(state.reachable for state in self._states.values())
+
+    def snapshot(self):
+        """{服务器: {'reachable', 'latency', 'checked'}}"""
+        with self._lock:
+            return {server: {'reachable': state.reachable, 'latency': state.latency,
+                             'checked': state.checked}
+                    for server, state in self._states.items()}
+
+    async def check(self, servers):
+        """并发检测到期的服务器，servers 为 {服务器: (地址, 端口)}，不再使用的服务器被移除"""
+        now = time.monotonic()
+        with self._lock:
+            for server in list(self._states):
+                if server not in servers:
+                    del self._states[server]
+            due = {server: address for server, address in servers.items()
+                   if server not in self._states or self._states[server].next_check <= now}
+        if not due:
+            return
+
+        results = await asyncio.gather(*(probe(host, port) for host, port in due.values()))
+
+        changed = False
+        now = time.monotonic()
+        with self._lock:
+            for server, latency in zip(due, results):
+                state = self._states.setdefault(server, _ServerState())
+                reachable = latency is not None
+                if reachable != state.reachable:
+                    changed = True
+                    if reachable:
+                        system_logger.logger.info(f"FTP服务器 {server} 恢复连通")
+                    else:
+                        system_logger.logger.warning(f"FTP服务器 {server} 无法连接")
+                state.reachable = reachable
+                state.latency = latency
+                state.checked = time.time()
+                state.next_check = now + (NETWORK_CHECK_INTERVAL if reachable
+                                          else NETWORK_RECHECK_INTERVAL)
+        if changed and self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception as e:
+                system_logger.logger.error(f"处理服务器状态变化时出错: {str(e)}")
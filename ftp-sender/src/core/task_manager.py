@@ -1,78 +1,145 @@
+import asyncio
 import os
+import posixpath
 import time
 import json
-import socket
 from datetime import datetime, timedelta
 import ftplib
 import threading
-import queue
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
-from utils.logger import Logger
+from utils.logger import Logger, system_logger
+from utils.file_walker import walk_files
+from core.ftp_pool import FTPConnectionPool
+from core.progress_tracker import ProgressTracker
+from core.upload_executor import UploadExecutor
+from core.upload_journal import UploadJournal
+from core.sent_index import SentFileIndex
+from core.upload_batch import UploadBatch
+from core.bandwidth import BandwidthLimiter
+from core.circuit_breaker import CircuitBreakers, CONNECTION_ERRORS
+from core.server_health import ServerHealth
+from core.task_scheduler import TaskScheduler
+from core.dedup_cache import DedupCache
+from core.file_readiness import FileReadinessTracker
+from core.directory_watcher import DirectoryWatcher
+from core.event_debouncer import (EventDebouncer, EVENT_DETECTED, EVENT_READY, EVENT_MODIFIED,
+                                  EVENT_CLOSED, EVENT_DELETED)
+from core import ftp_transfer
+from core import segmented_upload
+from core.ftp_transfer import SizeMismatchError, ChecksumMismatchError
+from utils.file_hash import HashCache, MultiHasher, new_hasher
+from utils.compression import CompressingReader
+from utils.constants import (SENT_INDEX_SAVE_EVERY, RESUME_MIN_SIZE, READY_MODE_STABLE,
+                             READY_MODE_MARKER, READY_MODE_RENAME,
+                             NETWORK_RECHECK_INTERVAL, FILE_ORDER_SIZE,
+                             VERIFY_SIZE, DEDUP_HASH_ALGORITHM, SENDFILE_CHUNK_SIZE,
+                             SENT_INDEX_HASH_ALGORITHM, SEGMENT_RETRY_INTERVAL)
 from models.task import FTPTask
 from models.task_status import TaskStatus
 
 class FTPTaskManager:
     def __init__(self):
         self.tasks = {}
-        self.observers = {}
-        self.timers = {}
         self.logger = Logger()
         self.running = False
         self.task_statuses = {}
         self.last_send_times = {}
-        self.transfer_progress = {}  # 存储传输进度
+        self.progress = ProgressTracker()  # 传输进度
         self.network_status = True   # 网络状态标志
-        self.progress_queue = queue.Queue()  # 进度更新队列
-        
+        self.ftp_pool = FTPConnectionPool()  # FTP会话连接池
+        self.journal = UploadJournal()  # 待上传文件日志
+        self.sent_indexes = {}  # 定时任务的已发送文件索引
+        self.dedup_caches = {}  # 各任务的内容去重缓存
+        self.no_segment_servers = {}  # 不支持分段写入的FTP服务器 -> 再次尝试分段上传的时间
+        self._temp_cleaned = set()  # 本次运行已清理过远程临时文件的任务
+        self._started = set()  # 已启动的任务
+        self.hash_cache = HashCache()  # 本地文件哈希缓存
+        self.no_checksum_servers = set()  # 不支持校验命令的 (FTP服务器, 算法)
+        self.bandwidth = BandwidthLimiter()  # 任务、服务器和全局带宽限制
+        self.breakers = CircuitBreakers(self._on_server_state_changed)  # 各FTP服务器的熔断状态
+        self.health = ServerHealth(self._on_server_state_changed)  # 各FTP服务器的连通性和延迟
+        # 即时模式上传执行器
+        self.upload_executor = UploadExecutor(self._upload_pending, gate=self._server_available)
+        self.readiness = FileReadinessTracker(self.upload_executor.submit)  # 文件写入完成检测
+        self.debouncer = EventDebouncer(self.on_file_events)  # 文件事件合并
+        self.watcher = DirectoryWatcher()  # 所有即时任务共用的目录监控
+        self.scheduler = TaskScheduler(self._run_scheduled)  # 所有定时任务共用的调度
+        self._start_background_tasks()
+
+    def _server_available(self, server):
+        """服务器可以开始上传：连通性检测可达且未熔断"""
+        return self.health.reachable(server) and self.breakers.available(server)
+
+    def _on_server_state_changed(self):
+        """服务器不可达、熔断或恢复后重新调度等待中的上传"""
+        executor = getattr(self, 'upload_executor', None)
+        if executor is not None:
+            executor.poke()
+
+    def _start_background_tasks(self):
+        """启动网络监控和定时清理"""
         # 启动网络监控
         self.network_monitor = threading.Thread(target=self._monitor_network)
         self.network_monitor.daemon = True
         self.network_monitor.start()
         
         # 启动清理定时器
-        self.cleanup_timer = threading.Timer(3600, self._cleanup_old_records)
+        self.cleanup_timer = threading.Timer(3600, self._cleanup_timer_fired)
         self.cleanup_timer.daemon = True
         self.cleanup_timer.start()
         
     def add_task(self, task: FTPTask):
-        """添加任务"""
+        """添加任务，替换同名任务时先停止原任务"""
+        if task.name in self._started:
+            self.stop_task(task.name)
         self.tasks[task.name] = task
         if task.enabled:
             self.start_task(task.name)
-            
+
+    def register_tasks(self, tasks):
+        """登记任务但不启动，点击启动后由 start_task 重新发送上次未完成的文件"""
+        for task in tasks:
+            self.tasks[task.name] = task
+
     def start_task(self, task_name):
-        """启动任务"""
+        """启动任务，已启动的任务不重复启动"""
         task = self.tasks.get(task_name)
-        if not task or not task.enabled:
+        if not task or not task.enabled or task_name in self._started:
             return
-            
+        self._started.add(task_name)
+
         if task.send_mode == "scheduled":
             # 定时发送模式
-            timer = threading.Timer(task.schedule_interval * 60, 
-                                 self._scheduled_send, 
-                                 args=(task_name,))
-            timer.daemon = True
-            timer.start()
-            self.timers[task_name] = timer
+            self._schedule_task(task)
         else:
             # 即时发送模式
-            observer = Observer()
-            event_handler = FileChangeHandler(self, task)
-            observer.schedule(event_handler, task.local_dir, recursive=False)
-            observer.start()
-            self.observers[task_name] = observer
+            if task.atomic_publish and task_name not in self._temp_cleaned:
+                cleaner = threading.Thread(target=self._cleanup_temp_files, args=(task,))
+                cleaner.daemon = True
+                cleaner.start()
+            self.upload_executor.start_task(task)
+            # 重新发送上次未完成的文件
+            for filename in self.journal.pending(task_name):
+                self.upload_executor.submit(task, filename)
+            self.watcher.add(task_name, task.local_dir, FileChangeHandler(self, task),
+                             task.recursive)
             
     def stop_task(self, task_name):
         """停止任务"""
-        if task_name in self.observers:
-            self.observers[task_name].stop()
-            self.observers[task_name].join()
-            del self.observers[task_name]
-            
-        if task_name in self.timers:
-            self.timers[task_name].cancel()
-            del self.timers[task_name]
+        self._started.discard(task_name)
+        self.watcher.remove(task_name)
+        self.debouncer.forget_task(task_name)
+        self.readiness.forget_task(task_name)
+        self.upload_executor.stop_task(task_name)
+        self._unschedule_task(task_name)
+
+    def _schedule_task(self, task: FTPTask):
+        """安排定时任务的下一次发送"""
+        self.scheduler.add(task)
+
+    def _unschedule_task(self, task_name):
+        """取消定时任务的下一次发送"""
+        self.scheduler.remove(task_name)
             
     def pause_task(self, task_name):
         """暂停任务但保持启用状态"""
@@ -81,6 +148,8 @@ class FTPTaskManager:
             return
         
         self.stop_task(task_name)
+        # 暂停期间不算错过的定时执行，恢复后从恢复时起算
+        self.scheduler.remove(task_name, forget=True)
         task.enabled = True
         self.update_task_status(task_name, TaskStatus.ENABLED)
 
@@ -148,55 +217,292 @@ class FTPTaskManager:
             'total_files': status.get('total_files', 0),
             'success_count': status.get('success_count', 0),
             'error_count': status.get('error_count', 0),
+            'skipped_count': status.get('skipped_count', 0),
+            'skipped_bytes': status.get('skipped_bytes', 0),
             'last_success': status.get('last_success'),
             'last_error': status.get('last_error'),
-            'last_error_time': status.get('last_error_time')
+            'last_error_time': status.get('last_error_time'),
+            'priority': task.priority,
+            'queued': self.upload_executor.pending_count(task_name),
+            'server_state': self.breakers.state(FTPConnectionPool.server_of(task)),
+            'next_run': self.scheduler.next_run(task_name)
         }
 
-    def _scheduled_send(self, task_name):
-        """定时发送处理"""
-        task = self.tasks.get(task_name)
-        if not task:
+    def get_server_states(self):
+        """获取各FTP服务器的连通性、延迟和熔断状态"""
+        states = self.health.snapshot()
+        for server, breaker in self.breakers.snapshot().items():
+            states.setdefault(server, {}).update(breaker)
+        return states
+
+    def _servers_to_check(self):
+        """需要检测连通性的服务器 {服务器: (地址, 端口)}"""
+        return {FTPConnectionPool.server_of(task): (task.ftp_address, task.port)
+                for task in list(self.tasks.values()) if task.enabled}
+
+    def get_queue_statistics(self):
+        """获取各优先级的排队数、进行中的上传数和等待时间（秒）"""
+        return self.upload_executor.statistics()
+
+    def _run_scheduled(self, task: FTPTask):
+        """执行一次定时发送，记录扫描错误"""
+        if task.atomic_publish and task.name not in self._temp_cleaned:
+            self._cleanup_temp_files(task)
+        try:
+            self._scan_and_send(task)
+        except Exception as e:
+            self.update_task_status(task.name, 'error', f"扫描目录失败: {str(e)}")
+            self.logger.log_error(task.name, task.local_dir, f"扫描目录失败: {str(e)}")
+
+    def _cleanup_temp_files(self, task: FTPTask):
+        """删除上次运行遗留的远程临时文件，待续传的文件除外
+
+        只删除属于本任务的临时文件：还原出的正式文件名符合任务的文件类型且本地文件存在。
+        共用同一远程目录的任务（连接池键相同）待上传的文件都不删除。
+        包含子目录时清理本地文件所在子目录对应的远程子目录。
+        先列出远程目录再读取待上传日志：列出时已存在的临时文件，
+        如果仍在上传中，其日志记录一定早于列目录，不会被误删。
+        """
+        self._temp_cleaned.add(task.name)
+        removed = 0
+        try:
+            owned = self._local_remote_names(task)
+            conn = self.ftp_pool.acquire(task)
+            try:
+                listed = []
+                for directory in sorted({posixpath.dirname(name) for name in owned}):
+                    prefix = directory + '/' if directory else ''
+                    listed.extend(prefix + name
+                                  for name in ftp_transfer.list_names(conn.ftp, directory))
+                pending = self._pending_remote_names(task)
+                for name in listed:
+                    filename = task.name_from_temp(posixpath.basename(name))
+                    if filename is None:
+                        continue
+                    filename = posixpath.join(posixpath.dirname(name), filename)
+                    if filename not in owned or filename in pending:
+                        continue
+                    try:
+                        conn.ftp.delete(name)
+                        removed += 1
+                    except ftplib.error_perm:
+                        # 已被改名或删除
+                        pass
+            except Exception:
+                self.ftp_pool.discard(conn)
+                raise
+            self.ftp_pool.release(conn)
+        except Exception as e:
+            self._temp_cleaned.discard(task.name)
+            self.logger.log_error(task.name, task.remote_dir, f"清理远程临时文件失败: {str(e)}")
             return
-            
-        # 扫描目录下的文件
-        for filename in os.listdir(task.local_dir):
-            if any(filename.endswith(ext) for ext in task.file_types):
-                self._send_file(task, filename)
-                
-        # 重新启动定时器
-        self.start_task(task_name)
+        if removed:
+            system_logger.logger.info(f"任务 {task.name} 清理了 {removed} 个远程临时文件")
+
+    @staticmethod
+    def _with_compressed_names(task: FTPTask, filenames):
+        """文件名加上压缩上传时的远程文件名"""
+        names = set(filenames)
+        if task.compression:
+            names |= {task.compressed_name(name) for name in names}
+        return names
+
+    def _local_remote_names(self, task: FTPTask):
+        """任务本地目录中符合文件类型的文件对应的远程文件名（相对于远程目录）"""
+        return self._with_compressed_names(
+            task, (filename for filename, entry in walk_files(task.local_dir, task.recursive)
+                   if task.matcher.matches(entry.name)))
+
+    def _pending_remote_names(self, task: FTPTask):
+        """与任务共用同一远程目录的所有任务待上传文件的远程文件名"""
+        key = FTPConnectionPool.make_key(task)
+        sharing = [other for other in list(self.tasks.values())
+                   if other.name != task.name and FTPConnectionPool.make_key(other) == key]
+        names = set()
+        for other in [task] + sharing:
+            names |= self._with_compressed_names(other, self.journal.pending(other.name))
+        return names
+
+    def _get_dedup_cache(self, task: FTPTask):
+        """获取任务的内容去重缓存"""
+        cache = self.dedup_caches.get(task.name)
+        if cache is None:
+            cache = self.dedup_caches[task.name] = DedupCache(task.name)
+        return cache
+
+    def _is_duplicate(self, task: FTPTask, filename, local_path, size, mtime_ns):
+        """文件内容是否与上次成功上传的同名文件相同，大小不同时不计算哈希"""
+        return self._get_dedup_cache(task).is_duplicate(
+            filename, size,
+            lambda: self.hash_cache.compute(local_path, size, mtime_ns, DEDUP_HASH_ALGORITHM))
+
+    def _count_skipped(self, task_name, size):
+        """累计去重跳过的文件数和字节数"""
+        status = self.task_statuses.setdefault(task_name, {})
+        status['skipped_count'] = status.get('skipped_count', 0) + 1
+        status['skipped_bytes'] = status.get('skipped_bytes', 0) + size
+
+    def _get_sent_index(self, task: FTPTask):
+        """获取任务的已发送文件索引"""
+        index = self.sent_indexes.get(task.name)
+        if index is None:
+            index = self.sent_indexes[task.name] = SentFileIndex(task.name, hash_cache=self.hash_cache)
+        return index
+
+    def _scan_and_send(self, task: FTPTask):
+        """扫描目录，按任务的发送顺序批量发送新增或发生变化的文件"""
+        index = self._get_sent_index(task)
+        existing = set()
+        changed = []
+        for filename, entry in walk_files(task.local_dir, task.recursive):
+            if not task.matcher.matches(entry.name):
+                continue
+
+            hash_path = entry.path if task.hash_check else None
+            try:
+                stat = entry.stat()
+                unchanged = index.is_unchanged(filename, stat.st_size, stat.st_mtime_ns,
+                                               hash_path)
+            except OSError:
+                # 扫描期间被删除或无法读取，下一次扫描再处理
+                continue
+            existing.add(filename)
+            if not unchanged:
+                changed.append((filename, stat.st_size, stat.st_mtime_ns))
+        index.prune(existing)
+        self.journal.prune_resume(task.name, existing)
+
+        if task.file_order == FILE_ORDER_SIZE:
+            changed.sort(key=lambda item: item[1])
+        else:
+            changed.sort(key=lambda item: item[2])
+
+        batch = UploadBatch(task)
+        try:
+            server = FTPConnectionPool.server_of(task)
+            for filename, _, _ in changed:
+                if not self._server_available(server):
+                    # 服务器不可达或熔断，剩余文件留到下一次扫描
+                    break
+                # 与其他任务的上传一起调度，需要等待时先归还批次占用的空闲会话
+                if not self.upload_executor.acquire(task, filename,
+                                                    lambda: self._release_batch_conn(batch)):
+                    break
+                batch.last_sent = None
+                try:
+                    sent = self._send_file(task, filename, batch)
+                finally:
+                    self.upload_executor.done(task)
+                if sent and batch.last_sent is not None:
+                    self._mark_sent(task, index, filename, *batch.last_sent)
+                    if batch.files % SENT_INDEX_SAVE_EVERY == 0:
+                        index.save()
+        finally:
+            self._finish_batch(batch)
+            index.save()
+            if task.dedup:
+                self._get_dedup_cache(task).save()
+
+    def _mark_sent(self, task: FTPTask, index, filename, size, mtime_ns):
+        """记录文件已发送
+
+        记录发送时的大小和修改时间，哈希取自上传时边发送边计算的缓存。
+        发送后文件又被修改时不记录，下一次扫描重新发送。
+        """
+        local_path = os.path.join(task.local_dir, filename)
+        try:
+            stat = os.stat(local_path)
+        except OSError:
+            return
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            return
+        content_hash = None
+        if task.hash_check:
+            content_hash = self.hash_cache.compute(local_path, size, mtime_ns,
+                                                   SENT_INDEX_HASH_ALGORITHM)
+        index.mark_sent(filename, size, mtime_ns, content_hash)
+
+    def _release_batch_conn(self, batch: UploadBatch):
+        """归还批次持有的会话"""
+        if batch.conn is not None:
+            self.ftp_pool.release(batch.conn)
+            batch.conn = None
+
+    def _finish_batch(self, batch: UploadBatch):
+        """归还批次持有的会话并记录汇总"""
+        self._release_batch_conn(batch)
+        if not batch.files and not batch.failed:
+            return
+        summary = batch.summary()
+        self.logger.log_batch_summary(batch.task.name, summary)
+        system_logger.logger.info(
+            f"任务 {batch.task.name} 批量发送完成: {summary['files']} 个文件成功, "
+            f"{summary['failed']} 个失败, {summary['bytes']} 字节, 耗时 {summary['duration']:.1f} 秒, "
+            f"{summary['throughput'] / 1024 / 1024:.2f} MB/s")
         
-    def _send_file(self, task: FTPTask, filename: str):
-        """发送文件，添加进度显示"""
+    def on_file_events(self, events):
+        """处理合并后的文件事件
+
+        新文件先批量记录到待上传日志，已确定写入完成的文件（标记文件或改名）直接提交上传，
+        其余的等待写入完成后再提交。
+        """
+        new_files = {}
+        for event in events:
+            if event.ready or event.detected:
+                new_files.setdefault(event.task.name, []).append(
+                    event.task.relative_name(event.path))
+        for task_name, filenames in new_files.items():
+            self.journal.record_many(task_name, filenames)
+
+        for event in events:
+            task = event.task
+            if event.forget:
+                self.readiness.forget(task, event.path)
+            if event.ready:
+                self.readiness.forget(task, event.path)
+                self.upload_executor.submit(task, task.relative_name(event.path))
+                continue
+            if event.detected:
+                self.readiness.watch(task, event.path, task.delay_after_generation)
+            elif event.modified:
+                self.readiness.touch(task, event.path)
+            if event.closed:
+                self.readiness.mark_closed(task, event.path)
+
+    def _upload_pending(self, task: FTPTask, filename: str):
+        """上传线程池的执行函数，上传成功后 _send_file 会从日志中移除记录"""
+        if not os.path.exists(os.path.join(task.local_dir, filename)):
+            # 文件已被删除，无需再发送
+            self.journal.mark_done(task.name, filename)
+            return
+        self._send_file(task, filename)
+
+    def _send_file(self, task: FTPTask, filename: str, batch: UploadBatch = None):
+        """发送文件，添加进度显示，重试时从中断处续传
+
+        传入 batch 时使用并保留批次持有的会话，不归还连接池。
+        """
+        progress = None
         try:
             local_path = os.path.join(task.local_dir, filename)
-            total_size = os.path.getsize(local_path)
-            self.transfer_progress[task.name] = {
-                'filename': filename,
-                'total_size': total_size,
-                'transferred': 0,
-                'percentage': 0
-            }
-
-            def progress_callback(transferred):
-                self.transfer_progress[task.name].update({
-                    'transferred': transferred,
-                    'percentage': int((transferred / total_size) * 100)
-                })
-                self.progress_queue.put({
-                    'task_name': task.name,
-                    'progress': self.transfer_progress[task.name]
-                })
-
-            retries = 0
-            
-            # 检查文件是否存在
-            if not os.path.exists(local_path):
+            # 检查文件是否存在，扫描或排队后可能已被删除
+            try:
+                total_size = os.path.getsize(local_path)
+            except OSError:
                 self.update_task_status(task.name, 'error', f"文件不存在: {filename}")
+                if batch is not None:
+                    batch.add_failure()
                 return False
-            
+            progress = self.progress.start(task.name, filename, total_size)
+
+            retries = 0
+            # 压缩上传的数据在发送时生成，不能续传
+            resume_allowed = total_size >= RESUME_MIN_SIZE and not task.compresses(total_size)
+
+            server = FTPConnectionPool.server_of(task)
             while retries < task.retry_count:
+                mtime_ns = None
+                connecting = False
                 try:
                     # 检查文件是否被占用
                     if self._is_file_locked(local_path):
@@ -206,44 +512,283 @@ class FTPTaskManager:
                     # 检查文件大小是否为0
                     if os.path.getsize(local_path) == 0:
                         raise Exception("文件大小为0，可能未完成写入")
-                        
-                    # 连接FTP
-                    with ftplib.FTP(task.ftp_address) as ftp:
-                        try:
-                            ftp.login(task.username, task.password)
-                        except ftplib.error_perm as e:
-                            raise Exception(f"FTP登录失败: {str(e)}")
-                            
-                        try:
-                            ftp.cwd(task.remote_dir)
-                        except ftplib.error_perm as e:
-                            raise Exception(f"切换远程目录失败: {str(e)}")
-                        
-                        # 上传文件
-                        with open(local_path, 'rb') as f:
-                            ftp.storbinary(f'STOR {filename}', f, callback=progress_callback)
-                            
+                    mtime_ns = os.stat(local_path).st_mtime_ns
+
+                    # 内容与上次成功发送的同名文件相同时跳过
+                    if task.dedup and self._is_duplicate(task, filename, local_path,
+                                                         total_size, mtime_ns):
+                        self.journal.mark_done(task.name, filename)
+                        if batch is not None:
+                            batch.last_sent = (total_size, mtime_ns)
+                        self._count_skipped(task.name, total_size)
+                        self.logger.log_skipped(task.name, filename, "内容与上次发送的相同")
+                        return True
+
+                    # 服务器不可达或熔断中不尝试连接，文件放回队列等待服务器恢复
+                    if not self.health.reachable(server) or not self.breakers.allow(server):
+                        return self._defer_upload(task, filename, batch, server)
+                    connecting = True
+
+                    # 从连接池获取已登录的FTP会话，批量发送时沿用上一个文件的会话
+                    if batch is not None and batch.conn is not None:
+                        conn, batch.conn = batch.conn, None
+                    else:
+                        conn = self.ftp_pool.acquire(task)
+                    try:
+                        # 包含子目录时在远程创建相同的目录结构
+                        self.ftp_pool.ensure_dirs(conn, posixpath.dirname(filename))
+                        details = self._upload_with_resume(task, conn, filename, local_path,
+                                                           total_size, mtime_ns, progress)
+                    except Exception:
+                        # 会话状态未知，丢弃后重试时使用新连接
+                        self.ftp_pool.discard(conn)
+                        if batch is not None:
+                            batch.reconnects += 1
+                        raise
+                    self.breakers.record_success(server)
+                    if batch is not None:
+                        batch.conn = conn
+                        batch.add_success(total_size, mtime_ns)
+                    else:
+                        self.ftp_pool.release(conn)
+
                     # 记录成功状态
+                    if task.dedup:
+                        self._get_dedup_cache(task).record(
+                            filename, total_size,
+                            self.hash_cache.compute(local_path, total_size, mtime_ns,
+                                                    DEDUP_HASH_ALGORITHM))
+                    self.journal.mark_done(task.name, filename)
                     self.update_task_status(task.name, 'success')
                     self.last_send_times[task.name] = datetime.now()
-                    self.logger.log_success(task.name, filename, retries)
-                    self.transfer_progress.pop(task.name, None)
+                    self.logger.log_success(task.name, filename, retries, details)
                     return True
                     
                 except Exception as e:
+                    if connecting:
+                        # 只有网络类错误计入服务器熔断，服务器返回的其他错误说明服务器可用
+                        if isinstance(e, CONNECTION_ERRORS):
+                            self.breakers.record_failure(server)
+                        else:
+                            self.breakers.record_success(server)
                     retries += 1
                     error_msg = f"发送失败 (第{retries}次尝试): {str(e)}"
                     self.update_task_status(task.name, 'error', error_msg)
                     self.logger.log_error(task.name, filename, error_msg)
+
+                    # 记录中断位置，下次重试（包括程序重启后）从远程已有大小处续传
+                    if resume_allowed and mtime_ns is not None:
+                        transferred = progress.transferred
+                        if isinstance(e, (SizeMismatchError, ChecksumMismatchError)):
+                            transferred = 0
+                        self.journal.set_resume_offset(task.name, filename, transferred, mtime_ns)
                     
-                    if retries < task.retry_count:
+                    if retries < task.retry_count and not self.breakers.is_open(server):
                         time.sleep(task.retry_interval)
-                        
+
+            if self.breakers.is_open(server):
+                # 重试用完时服务器已熔断，等待恢复后再发送
+                return self._defer_upload(task, filename, batch, server)
+            if batch is not None:
+                batch.add_failure()
             return False
             
         except Exception as e:
             self.logger.log_error(task.name, filename, str(e))
             raise
+        finally:
+            if progress:
+                self.progress.finish(progress)
+
+    def _defer_upload(self, task: FTPTask, filename, batch, server):
+        """服务器熔断时推迟上传：即时模式放回调度队列，定时批次留到下一次扫描"""
+        self.update_task_status(task.name, 'error', f"FTP服务器 {server} 暂不可用，等待恢复后发送")
+        if batch is None:
+            self.upload_executor.defer(task, filename)
+        return False
+
+    def _upload_with_resume(self, task: FTPTask, conn, filename, local_path,
+                            total_size, mtime_ns, progress):
+        """上传文件，上次传输中断时从远程已有大小处续传，完成后校验远程文件
+
+        大文件从头上传且任务启用分段时，使用多个会话并行上传。
+        启用原子发布时先上传为临时文件名，校验通过后再改名，续传也针对临时文件。
+        返回完整性校验等附加信息，用于记录到发送日志。
+        """
+        if task.compresses(total_size):
+            return self._upload_compressed(task, conn, filename, local_path, total_size,
+                                           mtime_ns, progress)
+
+        ftp = conn.ftp
+        target = task.temp_name(filename) if task.atomic_publish else filename
+        algorithm = task.verify_mode if task.verify_mode != VERIFY_SIZE else None
+        # 校验、去重和已发送索引需要但尚未缓存的哈希，从头上传时边发送边计算，文件只读取一次
+        algorithms = {name for name in (algorithm, *self._content_hash_algorithms(task))
+                      if name and self.hash_cache.get(local_path, total_size, mtime_ns, name) is None}
+
+        offset = 0
+        if total_size >= RESUME_MIN_SIZE and \
+                self.journal.get_resume_offset(task.name, filename, mtime_ns):
+            remote = ftp_transfer.remote_size(ftp, target)
+            if remote and remote <= total_size:
+                offset = remote
+
+        sent = self._sent_callback(task, progress.add)
+        chunk_size = self.bandwidth.chunk_size(task)
+        server = FTPConnectionPool.server_of(task)
+        if not offset and time.time() >= self.no_segment_servers.get(server, 0) and \
+                segmented_upload.segment_count(task, total_size) > 1:
+            try:
+                done = segmented_upload.upload_segmented(self.ftp_pool, task, conn, target,
+                                                         local_path, total_size, sent,
+                                                         chunk_size)
+            except ftp_transfer.ResumeNotSupported:
+                # 服务器不支持在指定位置写入，一段时间内改用单连接上传，之后再尝试（服务器可能已更换或升级）
+                self.no_segment_servers[server] = time.time() + SEGMENT_RETRY_INTERVAL
+                done = False
+            except Exception:
+                # 分段写入的远程文件不连续，不能从已发送字节数处续传
+                progress.reset(0)
+                raise
+            if done:
+                offset = total_size
+
+        if offset < total_size:
+            blocksize, sndbuf = ftp_transfer.transfer_tuning(task, total_size)
+            sendfile_chunk = SENDFILE_CHUNK_SIZE
+            if chunk_size:
+                # 限速时小块发送，避免一次发送大块数据后长时间等待
+                blocksize, sendfile_chunk = min(blocksize, chunk_size), min(sendfile_chunk, chunk_size)
+            hasher = MultiHasher(algorithms) if algorithms and not offset else None
+            with open(local_path, 'rb') as f:
+                progress.reset(offset)
+                try:
+                    ftp_transfer.upload(ftp, target, f, offset, sent, blocksize, sndbuf,
+                                        task.zero_copy, hasher, sendfile_chunk)
+                except ftp_transfer.ResumeNotSupported:
+                    # 服务器不支持续传，从头重新上传
+                    progress.reset(0)
+                    hasher = MultiHasher(algorithms) if algorithms else None
+                    ftp_transfer.upload(ftp, target, f, 0, sent, blocksize, sndbuf,
+                                        task.zero_copy, hasher, sendfile_chunk)
+            if hasher is not None:
+                for name, digest in hasher.hexdigests().items():
+                    self.hash_cache.put(local_path, total_size, mtime_ns, name, digest)
+
+        # 校验远程文件大小，服务器不支持SIZE时跳过
+        remote = ftp_transfer.remote_size(ftp, target)
+        if remote is not None and remote != total_size:
+            raise SizeMismatchError(f"上传后文件大小不一致: 本地 {total_size}, 远程 {remote}")
+        verify = {'mode': VERIFY_SIZE, 'server_checked': remote is not None}
+
+        if algorithm:
+            verify = self._verify_checksum(task, ftp, target, local_path, total_size, mtime_ns,
+                                           algorithm)
+
+        if task.atomic_publish:
+            ftp_transfer.publish(ftp, target, filename)
+        return {'verify': verify}
+
+    def _upload_compressed(self, task: FTPTask, conn, filename, local_path,
+                           total_size, mtime_ns, progress):
+        """边读取边压缩上传，远程文件名加上压缩格式的扩展名
+
+        压缩后的数据在发送时生成，不产生临时文件，因此不支持续传、分段上传和 sendfile，
+        完整性校验针对压缩后的数据进行。
+        """
+        ftp = conn.ftp
+        remote_name = task.compressed_name(filename)
+        target = task.temp_name(remote_name) if task.atomic_publish else remote_name
+        algorithm = task.verify_mode if task.verify_mode != VERIFY_SIZE else None
+        # 去重和已发送索引使用原始内容的哈希，压缩时顺便计算
+        raw_algorithms = {name for name in self._content_hash_algorithms(task)
+                          if self.hash_cache.get(local_path, total_size, mtime_ns, name) is None}
+        raw_hasher = MultiHasher(raw_algorithms) if raw_algorithms else None
+        sent_hasher = new_hasher(algorithm) if algorithm else None
+
+        blocksize, sndbuf = ftp_transfer.transfer_tuning(task, total_size)
+        chunk_size = self.bandwidth.chunk_size(task)
+        if chunk_size:
+            blocksize = min(blocksize, chunk_size)
+        with open(local_path, 'rb') as f:
+            reader = CompressingReader(f, task.compression, raw_hasher)
+            progress.reset(0)
+            read = [0]
+
+            def report(nbytes):
+                # 进度按已读取的原始字节数计算
+                progress.add(reader.bytes_in - read[0])
+                read[0] = reader.bytes_in
+
+            # 限速按实际发送的压缩后字节数计算
+            ftp_transfer.store(ftp, f'STOR {target}', reader, blocksize,
+                               self._sent_callback(task, report), sndbuf=sndbuf,
+                               hasher=sent_hasher)
+        if raw_hasher is not None:
+            for name, digest in raw_hasher.hexdigests().items():
+                self.hash_cache.put(local_path, total_size, mtime_ns, name, digest)
+
+        remote = ftp_transfer.remote_size(ftp, target)
+        if remote is not None and remote != reader.bytes_out:
+            raise SizeMismatchError(
+                f"上传后文件大小不一致: 压缩后 {reader.bytes_out}, 远程 {remote}")
+        verify = {'mode': VERIFY_SIZE, 'server_checked': remote is not None}
+
+        if algorithm:
+            verify = self._compare_checksum(task, ftp, target, algorithm,
+                                            sent_hasher.hexdigest())
+
+        if task.atomic_publish:
+            ftp_transfer.publish(ftp, target, remote_name)
+        return {
+            'verify': verify,
+            'compression': {
+                'method': task.compression,
+                'remote_name': remote_name,
+                'original_size': reader.bytes_in,
+                'compressed_size': reader.bytes_out,
+                'ratio': round(reader.ratio(), 4),
+                'cpu_time': round(reader.cpu_time, 3),
+            },
+        }
+
+    @staticmethod
+    def _content_hash_algorithms(task: FTPTask):
+        """去重和定时发送的已发送索引需要的原始内容哈希算法"""
+        algorithms = set()
+        if task.dedup:
+            algorithms.add(DEDUP_HASH_ALGORITHM)
+        if task.hash_check and task.send_mode == 'scheduled':
+            algorithms.add(SENT_INDEX_HASH_ALGORITHM)
+        return algorithms
+
+    def _sent_callback(self, task: FTPTask, on_sent):
+        """发送数据后的回调：先调用 on_sent(字节数)，再按带宽限制等待"""
+        throttle = self.bandwidth.throttle
+
+        def sent(nbytes):
+            on_sent(nbytes)
+            throttle(task, nbytes)
+        return sent
+
+    def _verify_checksum(self, task: FTPTask, ftp, target, local_path, total_size, mtime_ns,
+                         algorithm):
+        """比较本地与远程文件的校验值，服务器不支持校验命令时只记录本地校验值"""
+        # 续传或分段上传时无法边发送边计算，读取文件计算（结果会被缓存）
+        local_hash = self.hash_cache.compute(local_path, total_size, mtime_ns, algorithm)
+        return self._compare_checksum(task, ftp, target, algorithm, local_hash)
+
+    def _compare_checksum(self, task: FTPTask, ftp, target, algorithm, local_hash):
+        """获取远程文件的校验值并与 local_hash 比较，不一致时抛出异常"""
+        remote_hash = None
+        if (FTPConnectionPool.server_of(task), algorithm) not in self.no_checksum_servers:
+            remote_hash = ftp_transfer.remote_checksum(ftp, target, algorithm)
+            if remote_hash is None:
+                self.no_checksum_servers.add((FTPConnectionPool.server_of(task), algorithm))
+        if remote_hash is not None and remote_hash != local_hash:
+            raise ChecksumMismatchError(
+                f"上传后{algorithm}校验值不一致: 本地 {local_hash}, 远程 {remote_hash}")
+        return {'mode': algorithm, 'checksum': local_hash, 'server_checked': remote_hash is not None}
 
     def _is_file_locked(self, filepath):
         """检查文件是否被占用"""
@@ -256,6 +801,10 @@ class FTPTaskManager:
     def _cleanup_old_records(self):
         """清理旧的记录"""
         try:
+            # 定期保存去重缓存
+            for cache in list(self.dedup_caches.values()):
+                cache.save()
+
             # 清理24小时前的状态记录
             cutoff_time = datetime.now() - timedelta(hours=24)
             for task_name in list(self.task_statuses.keys()):
@@ -271,9 +820,16 @@ class FTPTaskManager:
                 if self.last_send_times[task_name] < one_hour_ago:
                     del self.last_send_times[task_name]
                     
+        except Exception as e:
+            system_logger.logger.error(f"清理旧记录时出错: {str(e)}")
+
+    def _cleanup_timer_fired(self):
+        """清理定时器回调"""
+        try:
+            self._cleanup_old_records()
         finally:
             # 重新启动清理定时器
-            self.cleanup_timer = threading.Timer(3600, self._cleanup_old_records)
+            self.cleanup_timer = threading.Timer(3600, self._cleanup_timer_fired)
             self.cleanup_timer.daemon = True
             self.cleanup_timer.start()
 
@@ -320,7 +876,15 @@ class FTPTaskManager:
 
     def get_transfer_progress(self, task_name):
         """获取文件传输进度"""
-        return self.transfer_progress.get(task_name)
+        return self.progress.get(task_name)
+
+    def get_progress_snapshot(self):
+        """获取所有进行中传输的进度、速度和剩余时间"""
+        return self.progress.snapshot()
+
+    def set_bandwidth(self, settings):
+        """更新带宽限制配置（config/settings.json 的 bandwidth 部分），正在进行的传输立即生效"""
+        self.bandwidth.configure(settings or {})
 
     def is_network_available(self):
         """获取网络状态"""
@@ -331,8 +895,8 @@ class FTPTaskManager:
         try:
             tasks_data = []
             for task in self.tasks.values():
-                task_dict = task.__dict__.copy()
-                task_dict.pop('_password', None)  # 移除敏感信息
+                task_dict = task.to_dict()
+                task_dict.pop('password', None)  # 移除敏感信息
                 tasks_data.append(task_dict)
                 
             with open(filepath, 'w', encoding='utf-8') as f:
@@ -380,6 +944,18 @@ class FTPTaskManager:
         # 停止所有现有任务
         for task_name in list(self.tasks.keys()):
             self.stop_task(task_name)
+
+        # 清除已删除任务的待上传记录
+        new_names = {task.name for task in tasks}
+        for task_name in self.tasks:
+            if task_name not in new_names:
+                self.journal.remove_task(task_name)
+                self._get_sent_index(self.tasks[task_name]).delete()
+                self.sent_indexes.pop(task_name, None)
+                self._get_dedup_cache(self.tasks[task_name]).delete()
+                self.dedup_caches.pop(task_name, None)
+                self.bandwidth.forget_task(task_name)
+                self.scheduler.remove(task_name, forget=True)
         
         # 清空现有任务
         self.tasks.clear()
@@ -391,14 +967,17 @@ class FTPTaskManager:
     def cleanup(self):
         """清理任务管理器资源"""
         try:
-            # 停止所有观察器
-            for observer in self.observers.values():
-                observer.stop()
-                observer.join()
+            # 停止目录监控和事件合并
+            self.watcher.stop()
+            self.debouncer.stop()
             
-            # 取消所有定时器
-            for timer in self.timers.values():
-                timer.cancel()
+            # 停止定时任务调度
+            self.scheduler.stop()
+
+            # 停止文件检测和上传线程池
+            self.breakers.stop()
+            self.readiness.stop()
+            self.upload_executor.shutdown()
             
             # 停止网络监控线程
             if hasattr(self, 'network_monitor'):
@@ -408,35 +987,92 @@ class FTPTaskManager:
             # 停止清理定时器
             if hasattr(self, 'cleanup_timer'):
                 self.cleanup_timer.cancel()
+
+            # 关闭连接池中的FTP会话
+            self.ftp_pool.close_all()
+
+            # 保存去重缓存
+            for cache in self.dedup_caches.values():
+                cache.save()
+
+            # 关闭待上传文件日志
+            self.journal.close()
             
         except Exception as e:
             print(f"清理任务管理器资源时出错: {str(e)}")
 
     def _monitor_network(self):
-        """监控网络连接状态"""
+        """监控各FTP服务器的连通性，所有服务器并发检测"""
         while True:
             try:
-                # 测试与FTP服务器的连接
-                for task in self.tasks.values():
-                    if task.enabled:
-                        socket.create_connection((task.ftp_address, 21), timeout=5)
-                self.network_status = True
-            except:
-                self.network_status = False
-            time.sleep(60)  # 每分钟检查一次
+                asyncio.run(self.health.check(self._servers_to_check()))
+                self.network_status = self.health.all_reachable()
+            except Exception as e:
+                system_logger.logger.error(f"检测FTP服务器连通性时出错: {str(e)}")
+            # 顺带回收空闲的FTP会话
+            self.ftp_pool.evict_idle()
+            time.sleep(NETWORK_RECHECK_INTERVAL)
 
 class FileChangeHandler(FileSystemEventHandler):
+    """把任务目录的文件事件交给事件合并，不在监控线程中处理"""
+
     def __init__(self, manager, task):
         self.manager = manager
         self.task = task
-        
+
+    def _add(self, path, action):
+        self.manager.debouncer.add(self.task, path, action)
+
+    def _in_scope(self, path):
+        """文件是否在任务的监控范围内（不包含子目录的任务忽略子目录中的文件）"""
+        return self.task.relative_name(path) is not None
+
     def on_created(self, event):
-        if event.is_directory:
+        if event.is_directory or not self._in_scope(event.src_path):
             return
-            
+
         filename = os.path.basename(event.src_path)
-        if any(filename.endswith(ext) for ext in self.task.file_types):
-            # 延迟发送
-            if self.task.delay_after_generation:
-                time.sleep(self.task.delay_after_generation)
-            self.manager._send_file(self.task, filename)
\ No newline at end of file
+        if self.task.ready_mode == READY_MODE_MARKER:
+            # 出现标记文件时发送对应的数据文件
+            marker = self.task.ready_marker
+            if filename.endswith(marker):
+                data_name = filename[:-len(marker)]
+                if data_name and self.task.matcher.matches(data_name):
+                    self._add(event.src_path[:-len(marker)], EVENT_READY)
+        elif self.task.ready_mode == READY_MODE_STABLE:
+            if self.task.matcher.matches(filename):
+                # 等待写入完成后再交给上传线程池
+                self._add(event.src_path, EVENT_DETECTED)
+
+    def on_modified(self, event):
+        if not event.is_directory and self.task.ready_mode == READY_MODE_STABLE \
+                and self._in_scope(event.src_path):
+            self._add(event.src_path, EVENT_MODIFIED)
+
+    def on_closed(self, event):
+        if not event.is_directory and self.task.ready_mode == READY_MODE_STABLE \
+                and self._in_scope(event.src_path):
+            self._add(event.src_path, EVENT_CLOSED)
+
+    def on_deleted(self, event):
+        if not event.is_directory and self._in_scope(event.src_path):
+            self._add(event.src_path, EVENT_DELETED)
+
+    def on_moved(self, event):
+        if event.is_directory:
+            return
+
+        if self._in_scope(event.src_path):
+            self._add(event.src_path, EVENT_DELETED)
+        # 移出监控范围的文件不发送
+        if not self._in_scope(event.dest_path):
+            return
+
+        filename = os.path.basename(event.dest_path)
+        if not self.task.matcher.matches(filename):
+            return
+        if self.task.ready_mode == READY_MODE_RENAME:
+            # 临时文件写完后改名，改名即表示写入完成
+            self._add(event.dest_path, EVENT_READY)
+        elif self.task.ready_mode == READY_MODE_STABLE:
+            self._add(event.dest_path, EVENT_DETECTED)
@@ -0,0 +1,218 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from utils.constants import (SCHEDULE_STATE_FILE, SCHEDULE_CATCH_UP_ONCE, SCHEDULE_CATCH_UP_ALL,
+                             SCHEDULE_CATCH_UP_MAX, SCHEDULE_MISFIRE_GRACE, SCHEDULE_MAX_SLEEP)
+from utils.logger import system_logger
+
+
+class _Schedule:
+    """一个定时任务的调度状态"""
+
+    def __init__(self, task):
+        self.task = task
+        self.due = None  # 下一次执行时间（时间戳），执行中为 None
+        self.gen = 0  # 堆条目版本，重新安排后旧条目失效
+        self.pending = 0  # 本次执行后还需立即补执行的次数
+
+
+class TaskScheduler:
+    """所有定时任务共用的调度器
+
+    各任务的下一次执行时间放在一个最小堆中，调度线程只在最早的执行时间到达时唤醒。
+    执行时间由任务的 cron 表达式或时间间隔计算，间隔从上一次应执行的时间起算，
+    不受发送耗时影响。同一任务的上一次发送结束前不会开始下一次，
+    期间以及停机期间错过的执行按任务的 catch_up 设置跳过、合并为一次或依次补执行。
+    每个任务上一次应执行的时间保存在 config/schedule_state.json，重启后据此判断错过的执行。
+
+    到期的任务通过 spawn(func, task) 在调度线程之外执行 run(task)。
+    """
+
+    def __init__(self, run, spawn=None, state_file=SCHEDULE_STATE_FILE):
+        self.run = run
+        self.spawn = spawn or self._spawn_thread
+        self.state_file = state_file
+        self._entries = {}  # task_name -> _Schedule
+        self._running = set()  # 正在执行的任务
+        self._last = {}  # task_name -> 上一次应执行的时间（时间戳）
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._active = True
+        self._load()
+        self._thread = threading.Thread(target=self._loop, name="task-scheduler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def add(self, task):
+        """安排任务的定时执行，已安排的任务按新配置重新计算下一次执行时间"""
+        with self._cond:
+            entry = self._entries[task.name] = _Schedule(task)
+            if task.name not in self._running:
+                # 执行中的任务在本次执行结束后再安排
+                self._push(entry, time.time())
+
+    def remove(self, task_name, forget=False):
+        """取消任务的定时执行，正在进行的执行会继续完成
+
+        forget 为真时同时清除上一次应执行的时间（任务被暂停或删除），
+        再次添加后从添加时起算，其间的执行不算错过，不会补执行。
+        """
+        with self._cond:
+            self._entries.pop(task_name, None)
+            if not forget or self._last.pop(task_name, None) is None:
+                return
+        self._save()
+
+    def next_run(self, task_name):
+        """任务下一次执行的时间戳，未安排或正在执行时返回 None"""
+        with self._cond:
+            entry = self._entries.get(task_name)
+            return entry.due if entry else None
+
+    def is_running(self, task_name):
+        with self._cond:
+            return task_name in self._running
+
+    def stop(self):
+        """停止调度线程并保存执行时间"""
+        with self._cond:
+            self._active = False
+            self._cond.notify()
+        self._thread.join(timeout=1)
+        self._save()
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self._last = json.load(f).get('last_fire', {})
+        except Exception:
+            # 状态损坏时按首次启动处理，不补执行
+            self._last = {}
+
+    def _save(self):
+        with self._cond:
+            data = {'last_fire': dict(self._last)}
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp_file = self.state_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            system_logger.logger.error(f"保存定时任务状态失败: {str(e)}")
+
+    def _push(self, entry, now):
+        """按上一次应执行的时间计算下一次执行时间并放入堆中，需持有锁"""
+        task = entry.task
+        last = self._last.get(task.name)
+        try:
+            entry.due = task.next_schedule_time(now if last is None else last)
+        except ValueError as e:
+            system_logger.logger.error(f"定时任务 {task.name} 无法安排: {str(e)}")
+            self._entries.pop(task.name, None)
+            return
+        entry.gen += 1
+        heapq.heappush(self._heap, (entry.due, next(self._seq), entry.gen, entry))
+        self._cond.notify()
+
+    def _fire(self, entry, now):
+        """任务到期，按错过的执行次数和补执行方式决定执行次数，需持有锁，返回是否开始执行"""
+        task = entry.task
+        slots = [entry.due]
+        entry.due = None
+        while len(slots) <= SCHEDULE_CATCH_UP_MAX:
+            next_time = task.next_schedule_time(slots[-1])
+            if next_time > now:
+                break
+            slots.append(next_time)
+        capped = len(slots) > SCHEDULE_CATCH_UP_MAX
+
+        missed = sum(1 for slot in slots if now - slot > SCHEDULE_MISFIRE_GRACE)
+        on_time = missed < len(slots)
+        if task.catch_up == SCHEDULE_CATCH_UP_ALL:
+            runs = min(len(slots), SCHEDULE_CATCH_UP_MAX)
+        elif task.catch_up == SCHEDULE_CATCH_UP_ONCE:
+            runs = 1
+        else:
+            runs = 1 if on_time else 0
+        if missed:
+            system_logger.logger.warning(
+                f"定时任务 {task.name} 错过 {missed}{'+' if capped else ''} 次执行，"
+                f"本次执行 {runs} 次")
+
+        self._last[task.name] = self._latest_slot(task, slots, now, capped)
+        if not runs:
+            self._push(entry, now)
+            return False
+        entry.pending = runs - 1
+        self._running.add(task.name)
+        return True
+
+    @staticmethod
+    def _latest_slot(task, slots, now, capped):
+        """不晚于 now 的最后一个执行时间"""
+        if task.cron is None:
+            # 按间隔对齐，不随停机时长漂移
+            period = task.schedule_interval * 60
+            return slots[0] + (now - slots[0]) // period * period
+        # cron 的执行时间与上一次无关，数量过多时直接从当前时间继续
+        return now if capped else slots[-1]
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                fired = []
+                while self._active:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay > 0:
+                        self._cond.wait(min(delay, SCHEDULE_MAX_SLEEP))
+                        continue
+                    now = time.time()
+                    while self._heap and self._heap[0][0] <= now:
+                        _, _, gen, entry = heapq.heappop(self._heap)
+                        if self._entries.get(entry.task.name) is not entry or entry.gen != gen:
+                            continue
+                        if self._fire(entry, now):
+                            fired.append(entry.task)
+                    # 错过的执行被跳过时也要保存执行时间
+                    break
+                if not self._active:
+                    return
+
+            self._save()
+            for task in fired:
+                self.spawn(self._execute, task)
+
+    def _execute(self, task):
+        try:
+            self.run(task)
+        except Exception as e:
+            system_logger.logger.error(f"定时任务 {task.name} 执行出错: {str(e)}")
+        finally:
+            self._finish(task.name)
+
+    def _finish(self, task_name):
+        with self._cond:
+            entry = self._entries.get(task_name)
+            if entry is None or not entry.pending or not self._active:
+                self._running.discard(task_name)
+                if entry is not None and self._active:
+                    self._push(entry, time.time())
+                return
+            entry.pending -= 1
+        self.spawn(self._execute, entry.task)
+
+    @staticmethod
+    def _spawn_thread(func, task):
+        thread = threading.Thread(target=func, args=(task,), name=f"schedule-{task.name}")
+        thread.daemon = True
+        thread.start()
@@ -0,0 +1,43 @@
+import time
+
+
+class UploadBatch:
+    """一次定时发送的批量上传
+
+    整批文件共用一个FTP会话，只在出错时丢弃会话重新连接，
+    结束后汇总文件数、字节数、耗时和吞吐量。
+    """
+
+    def __init__(self, task):
+        self.task = task
+        self.conn = None  # 本批次持有的连接池会话
+        self.files = 0
+        self.failed = 0
+        self.bytes = 0
+        self.reconnects = 0
+        self.last_sent = None  # 最近一个成功发送文件发送时的 (大小, 修改时间纳秒)
+        self._started = time.monotonic()
+
+    def add_success(self, nbytes, mtime_ns):
+        self.files += 1
+        self.bytes += nbytes
+        self.last_sent = (nbytes, mtime_ns)
+
+    def add_failure(self):
+        self.failed += 1
+
+    @property
+    def duration(self):
+        return time.monotonic() - self._started
+
+    def summary(self):
+        """批次汇总信息"""
+        duration = self.duration
+        return {
+            'files': self.files,
+            'failed': self.failed,
+            'bytes': self.bytes,
+            'reconnects': self.reconnects,
+            'duration': round(duration, 3),
+            'throughput': round(self.bytes / duration, 1) if duration > 0 else 0.0,  # 字节/秒
+        }
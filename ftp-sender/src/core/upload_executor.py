@@ -0,0 +1,105 @@
+import queue
+import threading
+from core.upload_scheduler import UploadScheduler
+from utils.constants import MAX_CONCURRENT_UPLOADS
+from utils.logger import system_logger
+
+_STOP = object()  # 工作线程退出标记
+
+
+class UploadExecutor:
+    """上传执行器
+
+    文件监控线程只负责提交上传，由 UploadScheduler 在各任务之间按优先级公平调度，
+    调度到的文件由固定数量的工作线程执行，所有任务同时进行的上传数不超过全局并发上限。
+    定时批次通过 acquire/done 与即时模式的上传共用同一个调度。
+    """
+
+    def __init__(self, upload_func, max_concurrency=MAX_CONCURRENT_UPLOADS, gate=None):
+        self.upload_func = upload_func  # upload_func(task, filename)
+        self.max_concurrency = max_concurrency
+        self.scheduler = UploadScheduler(self._on_ready, max_concurrency, gate)
+        self._active = set()  # 已启动的任务，停止后已调度但未开始的上传会被跳过
+        self._lock = threading.Lock()
+        self._ready = queue.Queue()
+        self._workers = []
+        self._start_workers()
+
+    def start_task(self, task):
+        """开始接受任务的上传"""
+        with self._lock:
+            self._active.add(task.name)
+
+    def stop_task(self, task_name):
+        """停止任务的上传，排队中的上传被丢弃，正在进行的上传会继续完成"""
+        with self._lock:
+            self._active.discard(task_name)
+        self.scheduler.remove_task(task_name)
+
+    def submit(self, task, filename):
+        """提交上传请求"""
+        with self._lock:
+            self._active.add(task.name)
+        self.scheduler.put(task, filename)
+
+    def defer(self, task, filename):
+        """服务器暂不可用时把上传放回队列，任务已停止时丢弃"""
+        if self._is_active(task):
+            self.scheduler.put(task, filename)
+
+    def poke(self):
+        """服务器状态变化后重新调度"""
+        self.scheduler.poke()
+
+    def acquire(self, task, filename, on_wait=None):
+        """在调用线程中上传前等待调度，任务停止时返回 False，上传后必须调用 done"""
+        return self.scheduler.acquire(task, filename, on_wait)
+
+    def done(self, task):
+        """acquire 之后的上传结束"""
+        self.scheduler.done(task)
+
+    def pending_count(self, task_name):
+        """获取任务排队中的上传数"""
+        return self.scheduler.pending_count(task_name)
+
+    def statistics(self):
+        """各优先级的排队数和等待时间"""
+        return self.scheduler.statistics()
+
+    def shutdown(self):
+        """丢弃排队中的上传并停止工作线程"""
+        with self._lock:
+            self._active.clear()
+        self.scheduler.close()
+        for _ in self._workers:
+            self._ready.put(_STOP)
+
+    def _start_workers(self):
+        for i in range(self.max_concurrency):
+            worker = threading.Thread(target=self._run, name=f"upload-{i}")
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def _on_ready(self, task, filename):
+        self._ready.put((task, filename))
+
+    def _is_active(self, task):
+        with self._lock:
+            return task.name in self._active
+
+    def _run(self):
+        while True:
+            item = self._ready.get()
+            if item is _STOP:
+                return
+
+            task, filename = item
+            try:
+                if self._is_active(task):
+                    self.upload_func(task, filename)
+            except Exception as e:
+                system_logger.logger.error(f"任务 {task.name} 上传 {filename} 时出错: {str(e)}")
+            finally:
+                self.scheduler.done(task)
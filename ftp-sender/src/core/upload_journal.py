@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from utils.constants import UPLOAD_JOURNAL_FILE
+
+
+class UploadJournal:
+    """待上传文件日志
+
+    每个检测到的文件先记录到SQLite数据库，上传成功后才删除记录，
+    程序重启后可重新发送未完成的文件，保证至少发送一次。
+    中断上传的续传位置单独保存在 resume_offsets 表中，定时发送的文件也使用，
+    不会因此被当作待重新发送的文件。
+    """
+
+    def __init__(self, db_file=UPLOAD_JOURNAL_FILE):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_uploads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_name TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                UNIQUE (task_name, filename)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS resume_offsets (
+                task_name TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                resume_offset INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                PRIMARY KEY (task_name, filename)
+            )
+        """)
+
+    def record(self, task_name, filename):
+        """记录待上传的文件，重复记录会被忽略"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO pending_uploads (task_name, filename, created_at) "
+                "VALUES (?, ?, ?)",
+                (task_name, filename, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+    def record_many(self, task_name, filenames):
+        """在一个事务中批量记录待上传的文件"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO pending_uploads (task_name, filename, created_at) "
+                    "VALUES (?, ?, ?)",
+                    [(task_name, filename, now) for filename in filenames])
+
+    def mark_done(self, task_name, filename):
+        """文件上传成功（或已不需要上传）后移除记录和续传位置"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                for table in ("pending_uploads", "resume_offsets"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE task_name = ? AND filename = ?",
+                        (task_name, filename))
+
+    def set_resume_offset(self, task_name, filename, offset, mtime_ns):
+        """记录中断上传已发送的字节数及当时的文件修改时间"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resume_offsets "
+                "(task_name, filename, resume_offset, mtime_ns) VALUES (?, ?, ?, ?)",
+                (task_name, filename, offset, mtime_ns))
+
+    def get_resume_offset(self, task_name, filename, mtime_ns):
+        """获取可续传的字节数，文件在中断后被修改过时返回0"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT resume_offset, mtime_ns FROM resume_offsets "
+                "WHERE task_name = ? AND filename = ?",
+                (task_name, filename)).fetchone()
+        if row is None or row[1] != mtime_ns:
+            return 0
+        return row[0]
+
+    def pending(self, task_name):
+        """按检测顺序获取任务未完成的文件"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename FROM pending_uploads WHERE task_name = ? ORDER BY id",
+                (task_name,)).fetchall()
+        return [row[0] for row in rows]
+
+    def prune_resume(self, task_name, existing):
+        """删除本地已不存在的文件的续传位置"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename FROM resume_offsets WHERE task_name = ?",
+                (task_name,)).fetchall()
+            missing = [(task_name, row[0]) for row in rows if row[0] not in existing]
+            if missing:
+                self._conn.executemany(
+                    "DELETE FROM resume_offsets WHERE task_name = ? AND filename = ?", missing)
+
+    def remove_task(self, task_name):
+        """删除任务的全部记录"""
+        with self._lock:
+            for table in ("pending_uploads", "resume_offsets"):
+                self._conn.execute(f"DELETE FROM {table} WHERE task_name = ?", (task_name,))
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,243 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from core.ftp_pool import FTPConnectionPool
+from utils.constants import (FTP_POOL_MAX_PER_SERVER, FILE_ORDER_SIZE, TASK_PRIORITY_NORMAL,
+                             TASK_PRIORITY_WEIGHTS, SCHEDULER_FILE_COST)
+
+
+class _Entry:
+    """排队中的一次上传"""
+
+    def __init__(self, task, filename, size, key, waiter=False):
+        self.task = task
+        self.filename = filename
+        self.size = size
+        self.key = key
+        self.enqueued = time.monotonic()
+        self.waiter = waiter  # 由调用线程自己上传（定时批次），调度到时只唤醒调用线程
+        self.granted = False
+        self.cancelled = False
+
+
+class _TaskQueue:
+    """一个任务的排队文件，按任务的发送顺序排列"""
+
+    def __init__(self, task):
+        self.task = task
+        self.heap = []
+        self.running = 0
+        self.finish = 0.0  # 上一个文件调度后的虚拟完成时间
+
+
+class UploadScheduler:
+    """所有任务共用的上传调度
+
+    各任务的文件先进入任务自己的队列（按 file_order 小文件优先或先旧后新），
+    有空闲的上传名额时，在并发未达到任务、FTP服务器和全局上限的任务中，
+    按开始时间公平排队（SFQ）选择下一个任务：每调度一个文件，任务的虚拟时间
+    增加 (文件大小 + 固定开销) / 优先级权重，虚拟时间最小的任务先调度。
+    因此大批量任务不会长期占用名额，少量文件的高优先级任务总能很快轮到。
+
+    即时模式的文件调度到时交给 on_ready(task, filename) 执行，执行完成后调用 done；
+    定时批次在自己的线程中调用 acquire 等待轮到自己，上传后调用 done。
+    gate(server) 返回假时该服务器的上传留在队列中（服务器熔断），状态变化后调用 poke 重新调度。
+    """
+
+    def __init__(self, on_ready, max_concurrency, gate=None):
+        self.on_ready = on_ready
+        self.max_concurrency = max_concurrency
+        self.gate = gate
+        self._cond = threading.Condition()
+        self._queues = {}  # task_name -> _TaskQueue
+        self._queued = set()  # 排队中的即时模式上传 (task_name, filename)
+        self._server_running = {}  # 服务器 -> 进行中的上传数
+        self._running = 0
+        self._vtime = 0.0
+        self._seq = itertools.count()
+        self._stats = {}  # 优先级 -> {'dispatched', 'total_wait', 'max_wait'}
+
+    def put(self, task, filename):
+        """加入即时模式上传，可在任意线程调用，已在排队中的文件不重复加入"""
+        with self._cond:
+            if (task.name, filename) in self._queued:
+                return
+            self._queued.add((task.name, filename))
+        self._enqueue(_Entry(task, filename, *self._order(task, filename)))
+
+    def acquire(self, task, filename, on_wait=None):
+        """等待轮到调用线程上传 filename，任务被移除时返回 False
+
+        不能立即开始时先调用 on_wait（例如归还批次占用的空闲连接）再等待。
+        """
+        entry = _Entry(task, filename, *self._order(task, filename), waiter=True)
+        self._enqueue(entry)
+        with self._cond:
+            if not entry.granted and not entry.cancelled and on_wait is not None:
+                self._cond.release()
+                try:
+                    on_wait()
+                finally:
+                    self._cond.acquire()
+            while not entry.granted and not entry.cancelled:
+                self._cond.wait()
+            return entry.granted
+
+    def done(self, task):
+        """一次上传结束，释放名额"""
+        with self._cond:
+            queue = self._queues.get(task.name)
+            if queue is not None:
+                queue.running -= 1
+                if not queue.running and not queue.heap:
+                    del self._queues[task.name]
+            server = self._server(task)
+            count = self._server_running.get(server, 0) - 1
+            if count > 0:
+                self._server_running[server] = count
+            else:
+                self._server_running.pop(server, None)
+            self._running -= 1
+            ready = self._dispatch()
+        self._start(ready)
+
+    def poke(self):
+        """外部条件（服务器状态）变化后重新调度"""
+        with self._cond:
+            ready = self._dispatch()
+        self._start(ready)
+
+    def remove_task(self, task_name):
+        """丢弃任务排队中的上传，等待中的 acquire 返回 False"""
+        with self._cond:
+            queue = self._queues.get(task_name)
+            if queue is None:
+                return
+            for _, _, entry in queue.heap:
+                entry.cancelled = True
+                if not entry.waiter:
+                    self._queued.discard((task_name, entry.filename))
+            queue.heap.clear()
+            if not queue.running:
+                del self._queues[task_name]
+            self._cond.notify_all()
+
+    def close(self):
+        """丢弃所有排队中的上传"""
+        with self._cond:
+            for task_name in list(self._queues):
+                self.remove_task(task_name)
+
+    def pending_count(self, task_name):
+        """任务排队中的上传数"""
+        with self._cond:
+            queue = self._queues.get(task_name)
+            return len(queue.heap) if queue else 0
+
+    def statistics(self):
+        """各优先级的排队数、进行中的上传数和等待时间（秒）"""
+        now = time.monotonic()
+        with self._cond:
+            result = {}
+            for queue in self._queues.values():
+                item = result.setdefault(self._priority(queue.task), {
+                    'queued': 0, 'running': 0, 'oldest_wait': 0.0})
+                item['queued'] += len(queue.heap)
+                item['running'] += queue.running
+                for _, _, entry in queue.heap:
+                    item['oldest_wait'] = max(item['oldest_wait'], now - entry.enqueued)
+            for priority, stats in self._stats.items():
+                item = result.setdefault(priority, {'queued': 0, 'running': 0, 'oldest_wait': 0.0})
+                item['dispatched'] = stats['dispatched']
+                item['avg_wait'] = stats['total_wait'] / stats['dispatched']
+                item['max_wait'] = stats['max_wait']
+            for item in result.values():
+                item.setdefault('dispatched', 0)
+                item.setdefault('avg_wait', 0.0)
+                item.setdefault('max_wait', 0.0)
+            return result
+
+    @staticmethod
+    def _order(task, filename):
+        """返回文件大小和队列内的排序键"""
+        try:
+            st = os.stat(os.path.join(task.local_dir, filename))
+            size, mtime = st.st_size, st.st_mtime
+        except OSError:
+            size, mtime = 0, time.time()
+        return size, size if task.file_order == FILE_ORDER_SIZE else mtime
+
+    @staticmethod
+    def _priority(task):
+        return task.priority if task.priority in TASK_PRIORITY_WEIGHTS else TASK_PRIORITY_NORMAL
+
+    @staticmethod
+    def _server(task):
+        return FTPConnectionPool.server_of(task)
+
+    def _enqueue(self, entry):
+        with self._cond:
+            queue = self._queues.get(entry.task.name)
+            if queue is None:
+                queue = self._queues[entry.task.name] = _TaskQueue(entry.task)
+            queue.task = entry.task
+            heapq.heappush(queue.heap, (entry.key, next(self._seq), entry))
+            ready = self._dispatch()
+        self._start(ready)
+
+    def _dispatch(self):
+        """在名额允许时选出可以开始的上传，需持有锁，返回需要交给 on_ready 的条目"""
+        ready = []
+        gates = {}  # 本次调度中各服务器是否可用
+        while self._running < self.max_concurrency:
+            best = None
+            for queue in self._queues.values():
+                if not queue.heap or queue.running >= max(1, queue.task.upload_workers):
+                    continue
+                server = self._server(queue.task)
+                if self._server_running.get(server, 0) >= FTP_POOL_MAX_PER_SERVER:
+                    continue
+                if self.gate is not None:
+                    if server not in gates:
+                        gates[server] = self.gate(server)
+                    if not gates[server]:
+                        continue
+                start = max(self._vtime, queue.finish)
+                rank = (start, queue.heap[0][1])
+                if best is None or rank < best[0]:
+                    best = (rank, queue)
+            if best is None:
+                break
+
+            (start, _), queue = best
+            _, _, entry = heapq.heappop(queue.heap)
+            task = entry.task
+            if not entry.waiter:
+                self._queued.discard((task.name, entry.filename))
+            priority = self._priority(task)
+            self._vtime = start
+            queue.finish = start + (entry.size + SCHEDULER_FILE_COST) / TASK_PRIORITY_WEIGHTS[priority]
+            queue.running += 1
+            server = self._server(task)
+            self._server_running[server] = self._server_running.get(server, 0) + 1
+            self._running += 1
+
+            wait = time.monotonic() - entry.enqueued
+            stats = self._stats.setdefault(priority, {'dispatched': 0, 'total_wait': 0.0,
+                                                      'max_wait': 0.0})
+            stats['dispatched'] += 1
+            stats['total_wait'] += wait
+            stats['max_wait'] = max(stats['max_wait'], wait)
+
+            entry.granted = True
+            if entry.waiter:
+                self._cond.notify_all()
+            else:
+                ready.append(entry)
+        return ready
+
+    def _start(self, ready):
+        for entry in ready:
+            self.on_ready(entry.task, entry.filename)
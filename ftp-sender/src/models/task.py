@@ -1,25 +1,138 @@
+import os
+from datetime import datetime
+from utils.constants import (DEFAULT_UPLOAD_WORKERS, READY_MODE_STABLE, READY_MODE_MARKER,
+                             READY_MODE_RENAME, DEFAULT_READY_MARKER, EVENT_DEBOUNCE_WINDOW,
+                             FILE_ORDER_SIZE, FILE_ORDER_AGE, DEFAULT_SEGMENT_MIN_SIZE,
+                             DEFAULT_TEMP_SUFFIX, VERIFY_SIZE, VERIFY_CRC32, VERIFY_MD5,
+                             VERIFY_SHA256, COMPRESSION_NONE, COMPRESSION_EXTENSIONS,
+                             DEFAULT_COMPRESSION_MIN_SIZE, TASK_PRIORITY_NORMAL,
+                             TASK_PRIORITY_WEIGHTS, DEFAULT_FTP_PORT, SCHEDULE_CATCH_UP_SKIP,
+                             SCHEDULE_CATCH_UP_ONCE, SCHEDULE_CATCH_UP_ALL,
+                             DEFAULT_SCHEDULE_CATCH_UP)
+from utils.cron import CronExpression
+from utils.file_matcher import FileMatcher
+
 class FTPTask:
     def __init__(self, name, enabled=True, ftp_address='', username='', password='',
-                 remote_dir='', local_dir='', file_types=None,
+                 remote_dir='', local_dir='', file_types=None, recursive=False,
                  send_mode='immediate', schedule_interval=None, 
                  delay_after_generation=None, retry_count=3, retry_interval=60,
+                 upload_workers=DEFAULT_UPLOAD_WORKERS, hash_check=False, file_order=FILE_ORDER_AGE,
+                 dedup=False,
+                 exclude_types=None, ready_mode=READY_MODE_STABLE,
+                 ready_marker=DEFAULT_READY_MARKER, debounce_window=EVENT_DEBOUNCE_WINDOW,
+                 transfer_blocksize=0, socket_sndbuf=0,
+                 tcp_nodelay=True, passive_mode=True, zero_copy=True, segment_count=1,
+                 segment_min_size=DEFAULT_SEGMENT_MIN_SIZE, atomic_publish=False, temp_prefix='',
+                 temp_suffix=DEFAULT_TEMP_SUFFIX, verify_mode=VERIFY_SIZE,
+                 compression=COMPRESSION_NONE, compression_min_size=DEFAULT_COMPRESSION_MIN_SIZE,
+                 rate_limit=0, priority=TASK_PRIORITY_NORMAL,
+                 port=DEFAULT_FTP_PORT, schedule_cron='', catch_up=DEFAULT_SCHEDULE_CATCH_UP,
                  status='enabled', last_error=None, last_run_time=None):  # 添加新参数
         self.name = name
         self.enabled = enabled
         self.ftp_address = ftp_address
+        self.port = port
         self.username = username
         self._password = password  # 使用下划线前缀表示这是私有属性
         self.remote_dir = remote_dir
         self.local_dir = local_dir
+        self.recursive = recursive  # 是否包含子目录，远程保留相同的目录结构
         self.file_types = file_types or ['*.*']
+        self.exclude_types = exclude_types or []  # 排除的文件类型
         self.send_mode = send_mode  # 'immediate' or 'scheduled'
         self.schedule_interval = schedule_interval  # 定时发送间隔（分钟）
-        self.delay_after_generation = delay_after_generation  # 立即发送时的延迟时间（秒）
+        self.schedule_cron = schedule_cron  # 定时发送的 cron 表达式，设置后代替时间间隔
+        self.catch_up = catch_up  # 停机期间错过的定时发送如何补执行
+        self.delay_after_generation = delay_after_generation  # 立即发送时的最短延迟时间（秒）
+        self.ready_mode = ready_mode  # 文件写入完成的判断方式
+        self.ready_marker = ready_marker  # 标记文件后缀
+        self.debounce_window = debounce_window  # 文件事件合并窗口（秒）
         self.retry_count = retry_count
         self.retry_interval = retry_interval  # 重试间隔（秒）
+        self.upload_workers = upload_workers  # 并发上传线程数
+        self.hash_check = hash_check  # 定时发送时是否用内容哈希判断文件变化
+        self.file_order = file_order  # 发送顺序：小文件优先或修改时间早的优先
+        self.dedup = dedup  # 跳过与上次成功发送的同名文件内容完全相同的文件
+        self.transfer_blocksize = transfer_blocksize  # 传输块大小（字节），0为自动
+        self.socket_sndbuf = socket_sndbuf  # 数据连接发送缓冲区（字节），0为自动
+        self.tcp_nodelay = tcp_nodelay  # 控制连接是否启用TCP_NODELAY
+        self.passive_mode = passive_mode  # 是否使用被动模式
+        self.zero_copy = zero_copy  # 系统支持时使用 sendfile 零拷贝上传
+        self.segment_count = segment_count  # 大文件分段并行上传的最大连接数，1为不分段
+        self.segment_min_size = segment_min_size  # 每段的最小字节数
+        self.atomic_publish = atomic_publish  # 先上传为临时文件名，校验后再改名为正式文件名
+        self.temp_prefix = temp_prefix  # 临时文件名前缀
+        self.temp_suffix = temp_suffix  # 临时文件名后缀
+        self.verify_mode = verify_mode  # 上传后的完整性校验方式
+        self.compression = compression  # 上传时的压缩方式，空字符串表示不压缩
+        self.compression_min_size = compression_min_size  # 小于此大小的文件不压缩
+        self.rate_limit = rate_limit  # 任务的上传限速（字节/秒），0 表示不限速
+        self.priority = priority  # 上传调度优先级：high/normal/low
         self.status = status  # 任务状态
         self.last_error = last_error  # 最后错误信息
         self.last_run_time = last_run_time  # 最后运行时间
+        self._matcher = None
+        self._matcher_key = None
+        self._cron = None
+
+    @property
+    def matcher(self):
+        """文件类型匹配器，文件类型配置变化时重新编译"""
+        key = (tuple(self.file_types), tuple(self.exclude_types))
+        if self._matcher is None or key != self._matcher_key:
+            self._matcher = FileMatcher(self.file_types, self.exclude_types)
+            self._matcher_key = key
+        return self._matcher
+
+    def relative_name(self, path):
+        """本地文件相对于监控目录的路径（/ 分隔），不在监控范围内时返回 None"""
+        try:
+            rel = os.path.relpath(path, self.local_dir)
+        except ValueError:
+            # Windows下不同盘符
+            return None
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep) or os.path.isabs(rel):
+            return None
+        if os.sep in rel and not self.recursive:
+            return None
+        return rel.replace(os.sep, '/')
+
+    @property
+    def cron(self):
+        """解析后的 cron 表达式，未设置时为 None"""
+        if not self.schedule_cron:
+            return None
+        if self._cron is None or self._cron.expression != self.schedule_cron.strip():
+            self._cron = CronExpression(self.schedule_cron)
+        return self._cron
+
+    def next_schedule_time(self, after):
+        """after（时间戳）之后的下一次定时发送时间戳"""
+        if self.cron is not None:
+            return self.cron.next_fire(after)
+        return after + self.schedule_interval * 60
+
+    def temp_name(self, filename):
+        """上传时使用的远程临时文件名，保留所在的子目录"""
+        head, sep, name = filename.rpartition('/')
+        return f"{head}{sep}{self.temp_prefix}{name}{self.temp_suffix}"
+
+    def compresses(self, file_size):
+        """文件是否需要压缩后上传"""
+        return bool(self.compression) and file_size >= self.compression_min_size
+
+    def compressed_name(self, filename):
+        """压缩上传时的远程文件名（加上压缩格式的扩展名）"""
+        return filename + COMPRESSION_EXTENSIONS[self.compression]
+
+    def name_from_temp(self, temp_name):
+        """从远程临时文件名还原正式文件名，不是临时文件时返回 None"""
+        prefix, suffix = self.temp_prefix, self.temp_suffix
+        if len(temp_name) <= len(prefix) + len(suffix) or \
+                not temp_name.startswith(prefix) or not temp_name.endswith(suffix):
+            return None
+        return temp_name[len(prefix):len(temp_name) - len(suffix)]
 
     @property
     def password(self):
@@ -45,16 +158,43 @@ class FTPTask:
             'name': self.name,
             'enabled': self.enabled,
             'ftp_address': self.ftp_address,
+            'port': self.port,
             'username': self.username,
             'password': self._password,  # 注意这里使用 password 而不是 _password
             'remote_dir': self.remote_dir,
             'local_dir': self.local_dir,
+            'recursive': self.recursive,
             'file_types': self.file_types,
+            'exclude_types': self.exclude_types,
             'send_mode': self.send_mode,
             'schedule_interval': self.schedule_interval,
+            'schedule_cron': self.schedule_cron,
+            'catch_up': self.catch_up,
             'delay_after_generation': self.delay_after_generation,
+            'ready_mode': self.ready_mode,
+            'ready_marker': self.ready_marker,
+            'debounce_window': self.debounce_window,
             'retry_count': self.retry_count,
             'retry_interval': self.retry_interval,
+            'upload_workers': self.upload_workers,
+            'hash_check': self.hash_check,
+            'file_order': self.file_order,
+            'dedup': self.dedup,
+            'transfer_blocksize': self.transfer_blocksize,
+            'socket_sndbuf': self.socket_sndbuf,
+            'tcp_nodelay': self.tcp_nodelay,
+            'passive_mode': self.passive_mode,
+            'zero_copy': self.zero_copy,
+            'segment_count': self.segment_count,
+            'segment_min_size': self.segment_min_size,
+            'atomic_publish': self.atomic_publish,
+            'temp_prefix': self.temp_prefix,
+            'temp_suffix': self.temp_suffix,
+            'verify_mode': self.verify_mode,
+            'compression': self.compression,
+            'compression_min_size': self.compression_min_size,
+            'rate_limit': self.rate_limit,
+            'priority': self.priority,
             'status': self.status,
             'last_error': self.last_error,
             'last_run_time': self.last_run_time
@@ -66,6 +206,8 @@ class FTPTask:
             raise ValueError("任务名称不能为空")
         if not self.ftp_address:
             raise ValueError("FTP地址不能为空")
+        if not 0 < self.port < 65536:
+            raise ValueError("无效的FTP端口")
         if not self.username:
             raise ValueError("用户名不能为空")
         if not self.remote_dir:
@@ -74,9 +216,42 @@ class FTPTask:
             raise ValueError("本地目录不能为空")
         if not self.file_types:
             raise ValueError("文件类型不能为空")
-        if self.send_mode == 'scheduled' and not self.schedule_interval:
-            raise ValueError("定时发送模式必须设置时间间隔")
+        if self.send_mode == 'scheduled':
+            if self.schedule_cron:
+                # 解析失败或永远不会执行时抛出 ValueError
+                self.cron.next_after(datetime.now())
+            elif not self.schedule_interval:
+                raise ValueError("定时发送模式必须设置时间间隔或 cron 表达式")
+        if self.catch_up not in (SCHEDULE_CATCH_UP_SKIP, SCHEDULE_CATCH_UP_ONCE,
+                                 SCHEDULE_CATCH_UP_ALL):
+            raise ValueError("无效的错过执行处理方式")
+        if self.ready_mode not in (READY_MODE_STABLE, READY_MODE_MARKER, READY_MODE_RENAME):
+            raise ValueError("无效的文件完成判断方式")
+        if self.ready_mode == READY_MODE_MARKER and not self.ready_marker:
+            raise ValueError("标记文件模式必须设置标记后缀")
+        if self.file_order not in (FILE_ORDER_SIZE, FILE_ORDER_AGE):
+            raise ValueError("无效的发送顺序")
+        if self.debounce_window < 0:
+            raise ValueError("事件合并窗口不能为负数")
         if self.retry_count < 0:
             raise ValueError("重试次数不能为负数")
         if self.retry_interval < 0:
-            raise ValueError("重试间隔不能为负数")
\ No newline at end of file
+            raise ValueError("重试间隔不能为负数")
+        if self.transfer_blocksize < 0 or self.socket_sndbuf < 0:
+            raise ValueError("传输块大小和发送缓冲区不能为负数")
+        if self.segment_count < 1 or self.segment_min_size <= 0:
+            raise ValueError("分段数至少为1，最小分段大小必须大于0")
+        if self.atomic_publish and not (self.temp_prefix or self.temp_suffix):
+            raise ValueError("临时文件名必须设置前缀或后缀")
+        if self.verify_mode not in (VERIFY_SIZE, VERIFY_CRC32, VERIFY_MD5, VERIFY_SHA256):
+            raise ValueError("无效的完整性校验方式")
+        if self.compression != COMPRESSION_NONE and self.compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError("无效的压缩方式")
+        if self.compression_min_size < 0:
+            raise ValueError("最小压缩大小不能为负数")
+        if self.rate_limit < 0:
+            raise ValueError("限速不能为负数")
+        if self.priority not in TASK_PRIORITY_WEIGHTS:
+            raise ValueError("无效的优先级")
+        if self.upload_workers < 1:
+            raise ValueError("并发上传数至少为1")
\ No newline at end of file
@@ -0,0 +1,170 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+                             QPushButton, QHeaderView, QMessageBox, QLabel, QSpinBox)
+from core.bandwidth import parse_time, server_key, normalize_server_limits
+from utils.config import ConfigManager
+from utils.constants import DEFAULT_FTP_PORT
+
+
+def _format_limits(limits):
+    """{名称: 字节/秒} -> "名称=KB/s;..." """
+    return ";".join(f"{name}={rate // 1024}" for name, rate in limits.items())
+
+
+def _parse_limits(text):
+    """"名称=KB/s;..." -> {名称: 字节/秒}"""
+    limits = {}
+    for item in text.split(";"):
+        if not item.strip():
+            continue
+        name, sep, rate = item.rpartition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"格式应为 名称=KB/s: {item}")
+        limits[name.strip()] = int(rate) * 1024
+    return limits
+
+
+class BandwidthDialog(QDialog):
+    """带宽限制设置，保存到 config/settings.json，运行中的任务立即生效"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.config_manager = ConfigManager()
+        try:
+            self.settings = self.config_manager.load_settings()
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"加载设置失败: {str(e)}")
+            self.settings = {}
+        self.setWindowTitle("带宽限制")
+        self.setMinimumSize(700, 500)
+        self.initUI()
+        self.load_settings()
+
+    def initUI(self):
+        layout = QVBoxLayout()
+
+        # 全局限速
+        global_layout = QHBoxLayout()
+        global_layout.addWidget(QLabel("全部任务总限速(KB/s):"))
+        self.global_limit_spin = QSpinBox()
+        self.global_limit_spin.setRange(0, 10 * 1024 * 1024)
+        self.global_limit_spin.setSpecialValueText("不限速")
+        global_layout.addWidget(self.global_limit_spin)
+        global_layout.addStretch()
+        layout.addLayout(global_layout)
+
+        # 各服务器限速
+        layout.addWidget(QLabel(f"FTP服务器限速（同一服务器的所有任务共用，只填地址时使用端口{DEFAULT_FTP_PORT}）:"))
+        self.server_table = QTableWidget(0, 2)
+        self.server_table.setHorizontalHeaderLabels(["FTP服务器(地址:端口)", "限速(KB/s)"])
+        self.server_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.server_table)
+        layout.addLayout(self._table_buttons(self.server_table))
+
+        # 时段配置
+        layout.addWidget(QLabel("时段配置（时段内覆盖以上设置，留空表示不覆盖，"
+                                "限速格式为 名称=KB/s，服务器名称为 地址:端口，多个用 ; 分隔）:"))
+        self.profile_table = QTableWidget(0, 5)
+        self.profile_table.setHorizontalHeaderLabels(
+            ["开始(HH:MM)", "结束(HH:MM)", "总限速(KB/s)", "服务器限速", "任务限速"])
+        self.profile_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.profile_table)
+        layout.addLayout(self._table_buttons(self.profile_table))
+
+        # 确定取消按钮
+        button_layout = QHBoxLayout()
+        save_btn = QPushButton("保存")
+        cancel_btn = QPushButton("取消")
+        save_btn.clicked.connect(self.accept)
+        cancel_btn.clicked.connect(self.reject)
+        button_layout.addStretch()
+        button_layout.addWidget(save_btn)
+        button_layout.addWidget(cancel_btn)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def _table_buttons(self, table):
+        buttons = QHBoxLayout()
+        add_btn = QPushButton("添加")
+        delete_btn = QPushButton("删除")
+        add_btn.clicked.connect(lambda: table.insertRow(table.rowCount()))
+        delete_btn.clicked.connect(lambda: table.removeRow(table.currentRow()))
+        buttons.addWidget(add_btn)
+        buttons.addWidget(delete_btn)
+        buttons.addStretch()
+        return buttons
+
+    @staticmethod
+    def _set_row(table, row, values):
+        table.insertRow(row)
+        for column, value in enumerate(values):
+            table.setItem(row, column, QTableWidgetItem(value))
+
+    @staticmethod
+    def _cell(table, row, column):
+        item = table.item(row, column)
+        return item.text().strip() if item else ""
+
+    def load_settings(self):
+        """把设置加载到界面"""
+        bandwidth = self.settings.get("bandwidth", {})
+        self.global_limit_spin.setValue(bandwidth.get("global_limit", 0) // 1024)
+        server_limits = normalize_server_limits(bandwidth.get("server_limits", {}))
+        for row, (server, rate) in enumerate(server_limits.items()):
+            self._set_row(self.server_table, row, [server, str(rate // 1024)])
+        for row, profile in enumerate(bandwidth.get("profiles", [])):
+            global_limit = profile.get("global_limit")
+            self._set_row(self.profile_table, row, [
+                profile.get("start", ""),
+                profile.get("end", ""),
+                "" if global_limit is None else str(global_limit // 1024),
+                _format_limits(normalize_server_limits(profile.get("server_limits", {}))),
+                _format_limits(profile.get("task_limits", {})),
+            ])
+
+    def get_bandwidth(self):
+        """获取界面上的带宽限制设置，格式错误时抛出 ValueError"""
+        server_limits = {}
+        for row in range(self.server_table.rowCount()):
+            server = self._cell(self.server_table, row, 0)
+            if server:
+                server_limits[server_key(server)] = \
+                    int(self._cell(self.server_table, row, 1) or 0) * 1024
+
+        profiles = []
+        for row in range(self.profile_table.rowCount()):
+            start = self._cell(self.profile_table, row, 0)
+            end = self._cell(self.profile_table, row, 1)
+            if not start and not end:
+                continue
+            parse_time(start)
+            parse_time(end)
+            profile = {"start": start, "end": end}
+            global_limit = self._cell(self.profile_table, row, 2)
+            if global_limit:
+                profile["global_limit"] = int(global_limit) * 1024
+            server_text = self._cell(self.profile_table, row, 3)
+            if server_text:
+                profile["server_limits"] = normalize_server_limits(_parse_limits(server_text))
+            task_text = self._cell(self.profile_table, row, 4)
+            if task_text:
+                profile["task_limits"] = _parse_limits(task_text)
+            profiles.append(profile)
+
+        return {
+            "global_limit": self.global_limit_spin.value() * 1024,
+            "server_limits": server_limits,
+            "profiles": profiles,
+        }
+
+    def accept(self):
+        """保存按钮点击处理"""
+        try:
+            self.settings["bandwidth"] = self.get_bandwidth()
+        except ValueError as e:
+            QMessageBox.warning(self, "错误", f"设置格式错误: {str(e)}")
+            return
+        try:
+            self.config_manager.save_settings(self.settings)
+            super().accept()
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"保存失败: {str(e)}")
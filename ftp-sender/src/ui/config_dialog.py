@@ -6,12 +6,14 @@ from PyQt5.QtCore import Qt
 import json
 from models.task import FTPTask
 from ui.task_edit_dialog import TaskEditDialog
+from ui.bandwidth_dialog import BandwidthDialog
 from utils.config import ConfigManager  # 添加导入
 
 class ConfigDialog(QDialog):
     def __init__(self, parent=None, tasks=None):
         super().__init__(parent)
         self.config_manager = ConfigManager()
+        self.bandwidth = None  # 修改后的带宽限制设置，未修改时为 None
         
         # 如果没有传入任务列表，则从配置文件加载
         if tasks is None:
@@ -38,16 +40,19 @@ class ConfigDialog(QDialog):
         self.delete_btn = QPushButton("删除任务")
         self.import_btn = QPushButton("导入配置")
         self.export_btn = QPushButton("导出配置")
+        self.bandwidth_btn = QPushButton("带宽限制")
         
         self.add_btn.clicked.connect(self.add_task)
         self.edit_btn.clicked.connect(self.edit_task)
         self.delete_btn.clicked.connect(self.delete_task)
         self.import_btn.clicked.connect(self.import_config)
         self.export_btn.clicked.connect(self.export_config)
+        self.bandwidth_btn.clicked.connect(self.edit_bandwidth)
         
         toolbar.addWidget(self.add_btn)
         toolbar.addWidget(self.edit_btn)
         toolbar.addWidget(self.delete_btn)
+        toolbar.addWidget(self.bandwidth_btn)
         toolbar.addStretch()
         toolbar.addWidget(self.import_btn)
         toolbar.addWidget(self.export_btn)
@@ -133,6 +138,12 @@ class ConfigDialog(QDialog):
                 setattr(task, key, value)
             self.load_tasks()
             
+    def edit_bandwidth(self):
+        """编辑带宽限制，保存后立即保存到设置文件"""
+        dialog = BandwidthDialog(self)
+        if dialog.exec_():
+            self.bandwidth = dialog.settings["bandwidth"]
+            
     def delete_task(self):
         """删除选中的任务"""
         current_row = self.task_table.currentRow()
@@ -186,8 +197,8 @@ class ConfigDialog(QDialog):
             try:
                 tasks_data = []
                 for task in self.tasks:
-                    task_dict = task.__dict__.copy()
-                    task_dict.pop('_password', None)  # 移除敏感信息
+                    task_dict = task.to_dict()
+                    task_dict.pop('password', None)  # 移除敏感信息
                     tasks_data.append(task_dict)
                     
                 with open(file_path, 'w', encoding='utf-8') as f:
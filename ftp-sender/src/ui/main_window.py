@@ -21,7 +21,6 @@ from models.task import FTPTask
 from utils.config import ConfigManager
 from ui.config_dialog import ConfigDialog
 from ui.log_dialog import LogDialog
-import queue
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -178,6 +177,10 @@ class MainWindow(QMainWindow):
     def load_tasks(self):
         """加载任务配置"""
         try:
+            # 带宽限制等全局设置
+            settings = self.config_manager.load_settings()
+            self.task_manager.set_bandwidth(settings.get("bandwidth"))
+
             tasks_config = self.config_manager.load_tasks()
             for task_data in tasks_config["tasks"]:
                 # 处理密码字段
@@ -188,6 +191,8 @@ class MainWindow(QMainWindow):
                 task = FTPTask(**task_data)
                 self.tasks.append(task)
 
+            # 登记到任务管理器，点击启动后重新发送上次未完成的文件
+            self.task_manager.register_tasks(self.tasks)
             self.updateTaskList()
         except Exception as e:
             QMessageBox.warning(self, "错误", f"加载任务配置失败: {str(e)}")
@@ -226,27 +231,36 @@ class MainWindow(QMainWindow):
     def update_status(self):
         """更新进度显示"""
         try:
-            # 更新传输进度
-            while not self.task_manager.progress_queue.empty():
-                progress_data = self.task_manager.progress_queue.get_nowait()
-                task_name = progress_data['task_name']
-                progress = progress_data['progress']
-                
-                # 更新进度条
-                self.progress_bar.setValue(progress['percentage'])
-                self.progress_bar.setFormat(
-                    f"{task_name}: {progress['filename']} - {progress['percentage']}%"
-                )
-                
-                # 当传输完成时清空进度条
-                if progress['percentage'] == 100:
-                    QTimer.singleShot(2000, self.reset_progress_bar)
-                    
-        except queue.Empty:
-            pass
+            transfers = self.task_manager.get_progress_snapshot()
+            if not transfers:
+                if self.progress_bar.format():
+                    self.reset_progress_bar()
+                return
+
+            # 显示进度最慢的传输，其余传输只显示数量
+            progress = min(transfers, key=lambda p: p['percentage'])
+            text = f"{progress['task_name']}: {progress['filename']} - {progress['percentage']}%"
+            if progress['speed']:
+                text += f" {self.format_size(progress['speed'])}/s"
+            if progress['eta'] is not None:
+                text += f" 剩余 {int(progress['eta'] // 60):02d}:{int(progress['eta'] % 60):02d}"
+            if len(transfers) > 1:
+                text += f" (另有 {len(transfers) - 1} 个传输)"
+
+            self.progress_bar.setValue(progress['percentage'])
+            self.progress_bar.setFormat(text)
         except Exception as e:
             print(f"更新进度显示时出错: {str(e)}")
 
+    @staticmethod
+    def format_size(size):
+        """字节数的友好显示"""
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if size < 1024:
+                return f"{size:.1f}{unit}"
+            size /= 1024
+        return f"{size:.1f}TB"
+
     def reset_progress_bar(self):
         """重置进度条"""
         self.progress_bar.setValue(0)
@@ -342,7 +356,11 @@ class MainWindow(QMainWindow):
     def open_config_dialog(self):
         """打开任务配置对话框"""
         dialog = ConfigDialog(self, tasks=self.tasks)
-        if dialog.exec_():
+        accepted = dialog.exec_()
+        # 带宽限制单独保存，取消任务修改时也立即生效
+        if dialog.bandwidth is not None:
+            self.task_manager.set_bandwidth(dialog.bandwidth)
+        if accepted:
             # 更新任务列表
             self.tasks = dialog.get_tasks()
             # 更新任务管理器
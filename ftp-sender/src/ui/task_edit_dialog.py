@@ -1,6 +1,55 @@
-from PyQt5.QtWidgets import (QDialog, QLineEdit, QCheckBox, QComboBox, QSpinBox,
+from datetime import datetime
+from PyQt5.QtWidgets import (QDialog, QLineEdit, QCheckBox, QComboBox, QSpinBox, QDoubleSpinBox,
                            QLabel, QGridLayout, QHBoxLayout, QPushButton,
-                           QFileDialog, QWidget)
+                           QFileDialog, QWidget, QMessageBox)
+from utils.constants import (DEFAULT_UPLOAD_WORKERS, READY_MODE_STABLE, READY_MODE_MARKER,
+                             READY_MODE_RENAME, DEFAULT_READY_MARKER, EVENT_DEBOUNCE_WINDOW,
+                             FILE_ORDER_SIZE, FILE_ORDER_AGE, DEFAULT_SEGMENT_MIN_SIZE,
+                             DEFAULT_TEMP_SUFFIX, VERIFY_SIZE, VERIFY_CRC32, VERIFY_MD5,
+                             VERIFY_SHA256, COMPRESSION_NONE, COMPRESSION_GZIP, COMPRESSION_ZSTD,
+                             COMPRESSION_LZ4, DEFAULT_COMPRESSION_MIN_SIZE, TASK_PRIORITY_HIGH,
+                             TASK_PRIORITY_NORMAL, TASK_PRIORITY_LOW, DEFAULT_FTP_PORT,
+                             SCHEDULE_CATCH_UP_SKIP, SCHEDULE_CATCH_UP_ONCE, SCHEDULE_CATCH_UP_ALL,
+                             DEFAULT_SCHEDULE_CATCH_UP)
+from utils.compression import available_methods
+from utils.cron import CronExpression
+
+READY_MODE_NAMES = {
+    READY_MODE_STABLE: "大小稳定",
+    READY_MODE_MARKER: "标记文件",
+    READY_MODE_RENAME: "改名完成",
+}
+
+VERIFY_MODE_NAMES = {
+    VERIFY_SIZE: "文件大小",
+    VERIFY_CRC32: "CRC32",
+    VERIFY_MD5: "MD5",
+    VERIFY_SHA256: "SHA-256",
+}
+
+COMPRESSION_NAMES = {
+    COMPRESSION_NONE: "不压缩",
+    COMPRESSION_GZIP: "gzip",
+    COMPRESSION_ZSTD: "zstd",
+    COMPRESSION_LZ4: "lz4",
+}
+
+PRIORITY_NAMES = {
+    TASK_PRIORITY_HIGH: "高",
+    TASK_PRIORITY_NORMAL: "普通",
+    TASK_PRIORITY_LOW: "低",
+}
+
+CATCH_UP_NAMES = {
+    SCHEDULE_CATCH_UP_SKIP: "跳过",
+    SCHEDULE_CATCH_UP_ONCE: "补发一次",
+    SCHEDULE_CATCH_UP_ALL: "逐次补发",
+}
+
+FILE_ORDER_NAMES = {
+    FILE_ORDER_AGE: "先旧后新",
+    FILE_ORDER_SIZE: "小文件优先",
+}
 
 class TaskEditDialog(QDialog):
     def __init__(self, task=None, parent=None):
@@ -30,8 +79,15 @@ class TaskEditDialog(QDialog):
 
         # FTP配置
         layout.addWidget(QLabel("FTP地址:"), row, 0)
+        address_layout = QHBoxLayout()
         self.ftp_address_edit = QLineEdit()
-        layout.addWidget(self.ftp_address_edit, row, 1)
+        address_layout.addWidget(self.ftp_address_edit)
+        address_layout.addWidget(QLabel("端口:"))
+        self.port_spin = QSpinBox()
+        self.port_spin.setRange(1, 65535)
+        self.port_spin.setValue(DEFAULT_FTP_PORT)
+        address_layout.addWidget(self.port_spin)
+        layout.addLayout(address_layout, row, 1)
         row += 1
 
         layout.addWidget(QLabel("用户名:"), row, 0)
@@ -58,6 +114,8 @@ class TaskEditDialog(QDialog):
         self.browse_btn.clicked.connect(self.browse_local_dir)
         local_dir_layout.addWidget(self.local_dir_edit)
         local_dir_layout.addWidget(self.browse_btn)
+        self.recursive_cb = QCheckBox("包含子目录")
+        local_dir_layout.addWidget(self.recursive_cb)
         layout.addLayout(local_dir_layout, row, 1)
         row += 1
 
@@ -68,6 +126,12 @@ class TaskEditDialog(QDialog):
         layout.addWidget(self.file_types_edit, row, 1)
         row += 1
 
+        layout.addWidget(QLabel("排除类型:"), row, 0)
+        self.exclude_types_edit = QLineEdit()
+        self.exclude_types_edit.setPlaceholderText("示例: *.tmp;~*")
+        layout.addWidget(self.exclude_types_edit, row, 1)
+        row += 1
+
         # 发送模式
         layout.addWidget(QLabel("发送模式:"), row, 0)
         self.send_mode_combo = QComboBox()
@@ -84,6 +148,18 @@ class TaskEditDialog(QDialog):
         self.schedule_interval_spin.setRange(1, 1440)  # 1分钟到24小时
         self.schedule_interval_spin.setValue(60)
         scheduled_layout.addWidget(self.schedule_interval_spin)
+        scheduled_layout.addWidget(QLabel("cron:"))
+        self.schedule_cron_edit = QLineEdit()
+        self.schedule_cron_edit.setPlaceholderText("示例: 0 2 * * *，留空按间隔")
+        scheduled_layout.addWidget(self.schedule_cron_edit)
+        scheduled_layout.addWidget(QLabel("错过的执行:"))
+        self.catch_up_combo = QComboBox()
+        for policy, text in CATCH_UP_NAMES.items():
+            self.catch_up_combo.addItem(text, policy)
+        self.catch_up_combo.setCurrentIndex(self.catch_up_combo.findData(DEFAULT_SCHEDULE_CATCH_UP))
+        scheduled_layout.addWidget(self.catch_up_combo)
+        self.hash_check_cb = QCheckBox("按内容哈希判断文件变化")
+        scheduled_layout.addWidget(self.hash_check_cb)
         scheduled_layout.addStretch()
         self.scheduled_widget.setLayout(scheduled_layout)
         layout.addWidget(self.scheduled_widget, row, 1)
@@ -96,11 +172,45 @@ class TaskEditDialog(QDialog):
         self.delay_spin = QSpinBox()
         self.delay_spin.setRange(0, 3600)  # 0-3600秒
         immediate_layout.addWidget(self.delay_spin)
+        immediate_layout.addWidget(QLabel("完成判断:"))
+        self.ready_mode_combo = QComboBox()
+        for mode, text in READY_MODE_NAMES.items():
+            self.ready_mode_combo.addItem(text, mode)
+        self.ready_mode_combo.currentIndexChanged.connect(self.on_ready_mode_changed)
+        immediate_layout.addWidget(self.ready_mode_combo)
+        self.ready_marker_edit = QLineEdit(DEFAULT_READY_MARKER)
+        self.ready_marker_edit.setMaximumWidth(80)
+        immediate_layout.addWidget(self.ready_marker_edit)
+        immediate_layout.addWidget(QLabel("事件合并(秒):"))
+        self.debounce_spin = QDoubleSpinBox()
+        self.debounce_spin.setRange(0, 60)
+        self.debounce_spin.setSingleStep(0.1)
+        self.debounce_spin.setDecimals(1)
+        self.debounce_spin.setValue(EVENT_DEBOUNCE_WINDOW)
+        immediate_layout.addWidget(self.debounce_spin)
         immediate_layout.addStretch()
         self.immediate_widget.setLayout(immediate_layout)
         layout.addWidget(self.immediate_widget, row, 1)
         row += 1
 
+        # 上传调度（定时和即时模式）
+        layout.addWidget(QLabel("上传调度:"), row, 0)
+        schedule_layout = QHBoxLayout()
+        schedule_layout.addWidget(QLabel("优先级:"))
+        self.priority_combo = QComboBox()
+        for priority, text in PRIORITY_NAMES.items():
+            self.priority_combo.addItem(text, priority)
+        self.priority_combo.setCurrentIndex(self.priority_combo.findData(TASK_PRIORITY_NORMAL))
+        schedule_layout.addWidget(self.priority_combo)
+        schedule_layout.addWidget(QLabel("发送顺序:"))
+        self.file_order_combo = QComboBox()
+        for order, text in FILE_ORDER_NAMES.items():
+            self.file_order_combo.addItem(text, order)
+        schedule_layout.addWidget(self.file_order_combo)
+        schedule_layout.addStretch()
+        layout.addLayout(schedule_layout, row, 1)
+        row += 1
+
         # 重试设置
         retry_layout = QHBoxLayout()
         retry_layout.addWidget(QLabel("重试次数:"))
@@ -115,6 +225,109 @@ class TaskEditDialog(QDialog):
         layout.addLayout(retry_layout, row, 1)
         row += 1
 
+        # 并发上传
+        layout.addWidget(QLabel("并发上传数:"), row, 0)
+        workers_layout = QHBoxLayout()
+        self.upload_workers_spin = QSpinBox()
+        self.upload_workers_spin.setRange(1, 16)
+        self.upload_workers_spin.setValue(DEFAULT_UPLOAD_WORKERS)
+        workers_layout.addWidget(self.upload_workers_spin)
+        self.dedup_cb = QCheckBox("跳过内容与上次发送相同的文件")
+        workers_layout.addWidget(self.dedup_cb)
+        workers_layout.addStretch()
+        layout.addLayout(workers_layout, row, 1)
+        row += 1
+
+        # 传输设置
+        layout.addWidget(QLabel("传输设置:"), row, 0)
+        transfer_layout = QHBoxLayout()
+        transfer_layout.addWidget(QLabel("块大小(KB):"))
+        self.blocksize_spin = QSpinBox()
+        self.blocksize_spin.setRange(0, 16384)
+        self.blocksize_spin.setSpecialValueText("自动")
+        transfer_layout.addWidget(self.blocksize_spin)
+        transfer_layout.addWidget(QLabel("发送缓冲(KB):"))
+        self.sndbuf_spin = QSpinBox()
+        self.sndbuf_spin.setRange(0, 65536)
+        self.sndbuf_spin.setSpecialValueText("自动")
+        transfer_layout.addWidget(self.sndbuf_spin)
+        self.passive_mode_cb = QCheckBox("被动模式")
+        self.passive_mode_cb.setChecked(True)
+        transfer_layout.addWidget(self.passive_mode_cb)
+        self.tcp_nodelay_cb = QCheckBox("TCP_NODELAY")
+        self.tcp_nodelay_cb.setChecked(True)
+        transfer_layout.addWidget(self.tcp_nodelay_cb)
+        self.zero_copy_cb = QCheckBox("零拷贝")
+        self.zero_copy_cb.setChecked(True)
+        transfer_layout.addWidget(self.zero_copy_cb)
+        transfer_layout.addStretch()
+        layout.addLayout(transfer_layout, row, 1)
+        row += 1
+
+        # 原子发布
+        layout.addWidget(QLabel("原子发布:"), row, 0)
+        publish_layout = QHBoxLayout()
+        self.atomic_publish_cb = QCheckBox("先上传为临时文件再改名")
+        publish_layout.addWidget(self.atomic_publish_cb)
+        publish_layout.addWidget(QLabel("前缀:"))
+        self.temp_prefix_edit = QLineEdit()
+        self.temp_prefix_edit.setMaximumWidth(80)
+        publish_layout.addWidget(self.temp_prefix_edit)
+        publish_layout.addWidget(QLabel("后缀:"))
+        self.temp_suffix_edit = QLineEdit(DEFAULT_TEMP_SUFFIX)
+        self.temp_suffix_edit.setMaximumWidth(80)
+        publish_layout.addWidget(self.temp_suffix_edit)
+        publish_layout.addWidget(QLabel("完整性校验:"))
+        self.verify_mode_combo = QComboBox()
+        for mode, text in VERIFY_MODE_NAMES.items():
+            self.verify_mode_combo.addItem(text, mode)
+        publish_layout.addWidget(self.verify_mode_combo)
+        publish_layout.addStretch()
+        layout.addLayout(publish_layout, row, 1)
+        row += 1
+
+        # 分段上传
+        layout.addWidget(QLabel("分段上传:"), row, 0)
+        segment_layout = QHBoxLayout()
+        segment_layout.addWidget(QLabel("最大连接数:"))
+        self.segment_count_spin = QSpinBox()
+        self.segment_count_spin.setRange(1, 16)
+        self.segment_count_spin.setSpecialValueText("不分段")
+        segment_layout.addWidget(self.segment_count_spin)
+        segment_layout.addWidget(QLabel("每段最小(MB):"))
+        self.segment_min_size_spin = QSpinBox()
+        self.segment_min_size_spin.setRange(1, 1024 * 1024)
+        self.segment_min_size_spin.setValue(DEFAULT_SEGMENT_MIN_SIZE // (1024 * 1024))
+        segment_layout.addWidget(self.segment_min_size_spin)
+        segment_layout.addStretch()
+        layout.addLayout(segment_layout, row, 1)
+        row += 1
+
+        # 上传时压缩
+        layout.addWidget(QLabel("压缩上传:"), row, 0)
+        compression_layout = QHBoxLayout()
+        self.compression_combo = QComboBox()
+        # 只列出当前环境可用的压缩方式
+        for method in [COMPRESSION_NONE] + available_methods():
+            self.compression_combo.addItem(COMPRESSION_NAMES[method], method)
+        compression_layout.addWidget(self.compression_combo)
+        compression_layout.addWidget(QLabel("最小文件(KB):"))
+        self.compression_min_size_spin = QSpinBox()
+        self.compression_min_size_spin.setRange(0, 1024 * 1024)
+        self.compression_min_size_spin.setValue(DEFAULT_COMPRESSION_MIN_SIZE // 1024)
+        compression_layout.addWidget(self.compression_min_size_spin)
+        compression_layout.addStretch()
+        layout.addLayout(compression_layout, row, 1)
+        row += 1
+
+        # 上传限速
+        layout.addWidget(QLabel("上传限速(KB/s):"), row, 0)
+        self.rate_limit_spin = QSpinBox()
+        self.rate_limit_spin.setRange(0, 10 * 1024 * 1024)
+        self.rate_limit_spin.setSpecialValueText("不限速")
+        layout.addWidget(self.rate_limit_spin, row, 1)
+        row += 1
+
         # 确定取消按钮
         button_layout = QHBoxLayout()
         save_btn = QPushButton("保存")
@@ -128,6 +341,7 @@ class TaskEditDialog(QDialog):
 
         self.setLayout(layout)
         self.on_send_mode_changed(self.send_mode_combo.currentText())
+        self.on_ready_mode_changed()
 
     def browse_local_dir(self):
         """选择本地目录"""
@@ -141,16 +355,23 @@ class TaskEditDialog(QDialog):
         self.scheduled_widget.setVisible(is_scheduled)
         self.immediate_widget.setVisible(not is_scheduled)
 
+    def on_ready_mode_changed(self):
+        """完成判断方式切换处理"""
+        self.ready_marker_edit.setVisible(self.ready_mode_combo.currentData() == READY_MODE_MARKER)
+
     def load_task_data(self):
         """加载任务数据到界面"""
         self.name_edit.setText(self.task.name)
         self.enabled_cb.setChecked(self.task.enabled)
         self.ftp_address_edit.setText(self.task.ftp_address)
+        self.port_spin.setValue(self.task.port)
         self.username_edit.setText(self.task.username)
         self.password_edit.setText(self.task.password)
         self.remote_dir_edit.setText(self.task.remote_dir)
         self.local_dir_edit.setText(self.task.local_dir)
+        self.recursive_cb.setChecked(self.task.recursive)
         self.file_types_edit.setText(";".join(self.task.file_types))
+        self.exclude_types_edit.setText(";".join(self.task.exclude_types))
         
         is_scheduled = self.task.send_mode == "scheduled"
         self.send_mode_combo.setCurrentText("定时发送" if is_scheduled else "立即发送")
@@ -159,27 +380,95 @@ class TaskEditDialog(QDialog):
             self.schedule_interval_spin.setValue(self.task.schedule_interval)
         elif not is_scheduled and self.task.delay_after_generation:
             self.delay_spin.setValue(self.task.delay_after_generation)
+        self.ready_mode_combo.setCurrentIndex(self.ready_mode_combo.findData(self.task.ready_mode))
+        self.ready_marker_edit.setText(self.task.ready_marker)
+        self.debounce_spin.setValue(self.task.debounce_window)
+        self.schedule_cron_edit.setText(self.task.schedule_cron)
+        self.catch_up_combo.setCurrentIndex(self.catch_up_combo.findData(self.task.catch_up))
+        self.hash_check_cb.setChecked(self.task.hash_check)
+        self.file_order_combo.setCurrentIndex(self.file_order_combo.findData(self.task.file_order))
+        self.priority_combo.setCurrentIndex(self.priority_combo.findData(self.task.priority))
             
         self.retry_count_spin.setValue(self.task.retry_count)
         self.retry_interval_spin.setValue(self.task.retry_interval)
+        self.upload_workers_spin.setValue(self.task.upload_workers)
+        self.dedup_cb.setChecked(self.task.dedup)
+        self.blocksize_spin.setValue(self.task.transfer_blocksize // 1024)
+        self.sndbuf_spin.setValue(self.task.socket_sndbuf // 1024)
+        self.passive_mode_cb.setChecked(self.task.passive_mode)
+        self.tcp_nodelay_cb.setChecked(self.task.tcp_nodelay)
+        self.zero_copy_cb.setChecked(self.task.zero_copy)
+        self.atomic_publish_cb.setChecked(self.task.atomic_publish)
+        self.temp_prefix_edit.setText(self.task.temp_prefix)
+        self.temp_suffix_edit.setText(self.task.temp_suffix)
+        self.verify_mode_combo.setCurrentIndex(self.verify_mode_combo.findData(self.task.verify_mode))
+        self.segment_count_spin.setValue(self.task.segment_count)
+        self.segment_min_size_spin.setValue(max(1, self.task.segment_min_size // (1024 * 1024)))
+        index = self.compression_combo.findData(self.task.compression)
+        if index < 0:
+            # 配置的压缩方式缺少依赖，保留原设置
+            self.compression_combo.addItem(f"{self.task.compression}（未安装）", self.task.compression)
+            index = self.compression_combo.count() - 1
+        self.compression_combo.setCurrentIndex(index)
+        self.compression_min_size_spin.setValue(self.task.compression_min_size // 1024)
+        self.rate_limit_spin.setValue(self.task.rate_limit // 1024)
 
     def get_task_data(self):
         """获取界面数据"""
         file_types = [x.strip() for x in self.file_types_edit.text().split(";") if x.strip()]
+        exclude_types = [x.strip() for x in self.exclude_types_edit.text().split(";") if x.strip()]
         is_scheduled = self.send_mode_combo.currentText() == "定时发送"
         
         return {
             "name": self.name_edit.text(),
             "enabled": self.enabled_cb.isChecked(),
             "ftp_address": self.ftp_address_edit.text(),
+            "port": self.port_spin.value(),
             "username": self.username_edit.text(),
             "password": self.password_edit.text(),
             "remote_dir": self.remote_dir_edit.text(),
             "local_dir": self.local_dir_edit.text(),
+            "recursive": self.recursive_cb.isChecked(),
             "file_types": file_types,
+            "exclude_types": exclude_types,
             "send_mode": "scheduled" if is_scheduled else "immediate",
             "schedule_interval": self.schedule_interval_spin.value() if is_scheduled else None,
+            "schedule_cron": self.schedule_cron_edit.text().strip() if is_scheduled else '',
+            "catch_up": self.catch_up_combo.currentData(),
             "delay_after_generation": self.delay_spin.value() if not is_scheduled else None,
+            "ready_mode": self.ready_mode_combo.currentData(),
+            "ready_marker": self.ready_marker_edit.text().strip(),
+            "debounce_window": self.debounce_spin.value(),
+            "hash_check": self.hash_check_cb.isChecked(),
+            "file_order": self.file_order_combo.currentData(),
+            "priority": self.priority_combo.currentData(),
             "retry_count": self.retry_count_spin.value(),
-            "retry_interval": self.retry_interval_spin.value()
-        }
\ No newline at end of file
+            "retry_interval": self.retry_interval_spin.value(),
+            "upload_workers": self.upload_workers_spin.value(),
+            "dedup": self.dedup_cb.isChecked(),
+            "transfer_blocksize": self.blocksize_spin.value() * 1024,
+            "socket_sndbuf": self.sndbuf_spin.value() * 1024,
+            "passive_mode": self.passive_mode_cb.isChecked(),
+            "tcp_nodelay": self.tcp_nodelay_cb.isChecked(),
+            "zero_copy": self.zero_copy_cb.isChecked(),
+            "atomic_publish": self.atomic_publish_cb.isChecked(),
+            "temp_prefix": self.temp_prefix_edit.text().strip(),
+            "temp_suffix": self.temp_suffix_edit.text().strip(),
+            "verify_mode": self.verify_mode_combo.currentData(),
+            "segment_count": self.segment_count_spin.value(),
+            "segment_min_size": self.segment_min_size_spin.value() * 1024 * 1024,
+            "compression": self.compression_combo.currentData(),
+            "compression_min_size": self.compression_min_size_spin.value() * 1024,
+            "rate_limit": self.rate_limit_spin.value() * 1024
+        }
+
+    def accept(self):
+        """保存按钮点击处理，检查 cron 表达式"""
+        cron = self.schedule_cron_edit.text().strip()
+        if self.send_mode_combo.currentText() == "定时发送" and cron:
+            try:
+                CronExpression(cron).next_after(datetime.now())
+            except ValueError as e:
+                QMessageBox.warning(self, "错误", str(e))
+                return
+        super().accept()
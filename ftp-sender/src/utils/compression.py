@@ -0,0 +1,105 @@
+import time
+import zlib
+from utils.constants import (COMPRESSION_GZIP, COMPRESSION_LZ4, COMPRESSION_READ_SIZE,
+                             COMPRESSION_ZSTD)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# 各压缩方式需要的第三方包
+_PACKAGES = {COMPRESSION_ZSTD: 'zstandard', COMPRESSION_LZ4: 'lz4'}
+
+
+def available_methods():
+    """当前环境可用的压缩方式"""
+    methods = [COMPRESSION_GZIP]
+    if zstandard is not None:
+        methods.append(COMPRESSION_ZSTD)
+    if lz4_frame is not None:
+        methods.append(COMPRESSION_LZ4)
+    return methods
+
+
+class _Lz4Compressor:
+    """与 zlib 压缩对象接口相同的 LZ4 帧压缩"""
+
+    def __init__(self):
+        self._compressor = lz4_frame.LZ4FrameCompressor()
+        self._header = self._compressor.begin()
+
+    def compress(self, data):
+        out = self._header + self._compressor.compress(data)
+        self._header = b''
+        return out
+
+    def flush(self):
+        out = self._header + self._compressor.flush()
+        self._header = b''
+        return out
+
+
+def new_compressor(method):
+    """创建压缩对象（compress/flush 接口），缺少依赖时抛出异常"""
+    if method == COMPRESSION_GZIP:
+        # wbits=31 输出带 gzip 文件头的数据，可直接用 gunzip 解压
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if method not in _PACKAGES:
+        raise Exception(f"不支持的压缩方式: {method}")
+    if method not in available_methods():
+        raise Exception(f"压缩方式 {method} 需要安装 {_PACKAGES[method]}")
+    if method == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor().compressobj()
+    return _Lz4Compressor()
+
+
+class CompressingReader:
+    """读取时压缩的文件对象
+
+    read() 返回压缩后的数据，可直接交给 STOR 上传，不需要生成临时文件。
+    传入 hasher 时用读取的原始数据更新哈希。bytes_in/bytes_out 为原始和压缩后的字节数，
+    cpu_time 为压缩所用的CPU时间（秒）。
+    """
+
+    def __init__(self, f, method, hasher=None):
+        self.f = f
+        self.hasher = hasher
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_time = 0.0
+        self._compressor = new_compressor(method)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, size=-1):
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            data = self.f.read(COMPRESSION_READ_SIZE)
+            start = time.thread_time()
+            if data:
+                self.bytes_in += len(data)
+                if self.hasher is not None:
+                    self.hasher.update(data)
+                self._buffer += self._compressor.compress(data)
+            else:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+            self.cpu_time += time.thread_time() - start
+
+        if size < 0 or size >= len(self._buffer):
+            out = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            out = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        self.bytes_out += len(out)
+        return out
+
+    def ratio(self):
+        """压缩后与原始大小之比"""
+        return self.bytes_out / self.bytes_in if self.bytes_in else 1.0
@@ -15,6 +15,7 @@ system_logger.addHandler(handler)
 class ConfigManager:
     def __init__(self):
         self.config_file = "config/tasks.json"
+        self.settings_file = "config/settings.json"
         os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
 
     def load_tasks(self):
@@ -60,4 +61,23 @@ class ConfigManager:
                 json.dump(config_copy, f, indent=2, ensure_ascii=False)
         except Exception as e:
             system_logger.error(f"保存任务配置失败: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def load_settings(self):
+        """加载全局设置（带宽限制等）"""
+        if not os.path.exists(self.settings_file):
+            return {}
+        try:
+            with open(self.settings_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            raise Exception(f"读取设置文件失败: {str(e)}")
+
+    def save_settings(self, settings):
+        """保存全局设置"""
+        try:
+            with open(self.settings_file, 'w', encoding='utf-8') as f:
+                json.dump(settings, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            system_logger.error(f"保存设置失败: {str(e)}")
+            raise
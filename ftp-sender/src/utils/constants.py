@@ -7,9 +7,118 @@ FTP_TASK_STATUS_FAILED = "failed"
 DEFAULT_RETRY_INTERVAL = 5  # 发送失败重试等待间隔（秒）
 DEFAULT_RETRY_COUNT = 3      # 默认重试次数
 
+DEFAULT_FTP_PORT = 21
+
+# FTP连接池
+FTP_CONNECT_TIMEOUT = 30       # FTP连接/命令超时（秒）
+FTP_POOL_MAX_PER_SERVER = 4    # 每个FTP服务器的最大连接数
+FTP_POOL_IDLE_TIMEOUT = 300    # 空闲会话回收时间（秒）
+
+# 上传执行器
+DEFAULT_UPLOAD_WORKERS = 2     # 每个任务默认的上传线程数
+MAX_CONCURRENT_UPLOADS = 8     # 所有任务同时进行的最大上传数
+UPLOAD_JOURNAL_FILE = "config/upload_journal.db"  # 待上传文件日志
+RESUME_MIN_SIZE = 1024 * 1024  # 达到此大小的文件上传中断后续传（字节）
+
+# 上传调度（各任务之间按优先级加权公平排队）
+TASK_PRIORITY_HIGH = "high"
+TASK_PRIORITY_NORMAL = "normal"
+TASK_PRIORITY_LOW = "low"
+TASK_PRIORITY_WEIGHTS = {       # 各优先级分得的带宽份额之比
+    TASK_PRIORITY_HIGH: 16,
+    TASK_PRIORITY_NORMAL: 4,
+    TASK_PRIORITY_LOW: 1,
+}
+SCHEDULER_FILE_COST = 64 * 1024  # 调度时每个文件除大小外额外计算的开销（字节）
+
+# 传输进度
+PROGRESS_PUBLISH_INTERVAL_MS = 500  # 进度快照最短更新间隔（毫秒）
+PROGRESS_PUBLISH_STEP = 1           # 进度变化达到多少百分比时立即更新
+PROGRESS_SPEED_SMOOTHING = 0.3      # 传输速度指数平滑系数
+
+# 传输调优（任务中配置为0时自动选择）
+AUTO_BLOCKSIZE_STEPS = (       # (文件大小上限, 传输块大小)，单位字节
+    (1024 * 1024, 64 * 1024),
+    (64 * 1024 * 1024, 256 * 1024),
+    (float('inf'), 1024 * 1024),
+)
+AUTO_SNDBUF_MIN_FILE_SIZE = 64 * 1024 * 1024  # 达到此大小的文件使用较大的发送缓冲区
+AUTO_SNDBUF_SIZE = 4 * 1024 * 1024            # 自动选择的发送缓冲区大小
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024         # 零拷贝上传每次 sendfile 的字节数（进度更新粒度）
+DEFAULT_SEGMENT_MIN_SIZE = 256 * 1024 * 1024  # 分段上传时每段的最小字节数
+SEGMENT_RETRY_INTERVAL = 3600  # 服务器不支持分段上传时，经过此时间（秒）后再尝试
+DEFAULT_TEMP_SUFFIX = ".part"  # 先上传为临时文件再改名时使用的后缀
+
+# 上传完成后的完整性校验
+VERIFY_SIZE = "size"      # 只比较文件大小
+VERIFY_CRC32 = "crc32"
+VERIFY_MD5 = "md5"
+VERIFY_SHA256 = "sha256"
+HASH_CACHE_SIZE = 4096    # 文件哈希缓存的最大条目数
+
+# 带宽限制（令牌桶）
+BANDWIDTH_BURST_SECONDS = 0.5           # 令牌桶容量，相当于多少秒的限速流量
+BANDWIDTH_MIN_CHUNK = 16 * 1024         # 限速时每次发送的最小字节数
+BANDWIDTH_PROFILE_CHECK_INTERVAL = 30   # 重新判断时段配置的间隔（秒）
+
+# 上传时压缩
+COMPRESSION_NONE = ""
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"   # 需要安装 zstandard
+COMPRESSION_LZ4 = "lz4"     # 需要安装 lz4
+COMPRESSION_EXTENSIONS = {
+    COMPRESSION_GZIP: ".gz",
+    COMPRESSION_ZSTD: ".zst",
+    COMPRESSION_LZ4: ".lz4",
+}
+DEFAULT_COMPRESSION_MIN_SIZE = 64 * 1024  # 小于此大小的文件不压缩
+COMPRESSION_READ_SIZE = 256 * 1024        # 压缩时每次读取的原始字节数
+
+# 文件写入完成检测
+READINESS_INITIAL_INTERVAL = 0.2  # 初始轮询间隔（秒）
+READINESS_MAX_INTERVAL = 5        # 最大轮询间隔（秒）
+READINESS_STABLE_CHECKS = 2       # 大小和修改时间连续不变的次数
+READY_MODE_STABLE = "stable"      # 大小和修改时间稳定后发送
+READY_MODE_MARKER = "marker"      # 出现标记文件（如 a.csv.done）后发送
+READY_MODE_RENAME = "rename"      # 文件改名（临时文件写完后改名）后发送
+DEFAULT_READY_MARKER = ".done"
+EVENT_DEBOUNCE_WINDOW = 0.5        # 同一文件的事件在此时间（秒）内无新事件时才处理
+EVENT_DEBOUNCE_MAX_DELAY = 5       # 持续产生事件的文件最长等待时间（秒）
+
+# 定时发送
+SENT_INDEX_DIR = "config/sent_index"  # 已发送文件索引目录
+SENT_INDEX_SAVE_EVERY = 100           # 每发送多少个文件保存一次索引
+SENT_INDEX_HASH_ALGORITHM = "sha256"  # 索引记录的内容哈希算法
+FILE_ORDER_SIZE = "size"              # 小文件优先（定时和即时模式）
+FILE_ORDER_AGE = "age"                # 修改时间早的文件优先
+SCHEDULE_STATE_FILE = "config/schedule_state.json"  # 各定时任务上次应执行的时间
+SCHEDULE_CATCH_UP_SKIP = "skip"       # 停机期间错过的执行全部跳过，等待下一次
+SCHEDULE_CATCH_UP_ONCE = "once"       # 错过的执行合并为立即执行一次
+SCHEDULE_CATCH_UP_ALL = "all"         # 错过的每一次都依次补执行
+DEFAULT_SCHEDULE_CATCH_UP = SCHEDULE_CATCH_UP_ONCE
+SCHEDULE_CATCH_UP_MAX = 100           # 补执行的最大次数
+SCHEDULE_MISFIRE_GRACE = 60           # 超过应执行时间多少秒后视为错过（停机或上一次发送未结束）
+SCHEDULE_MAX_SLEEP = 300              # 调度线程最长等待时间（秒），防止系统时间调整或休眠后错过执行
+
+# 内容去重
+DEDUP_CACHE_DIR = "config/dedup_cache"  # 去重缓存目录
+DEDUP_CACHE_SIZE = 10000                # 每个任务最多记录的文件数
+DEDUP_CACHE_SAVE_EVERY = 100            # 每记录多少个文件保存一次
+DEDUP_HASH_ALGORITHM = "sha256"
+
 LOG_DIRECTORY = "logs"        # 日志目录
 LOG_SUBDIRECTORY_FORMAT = "%Y%m"  # 日志子目录格式
 
+# FTP服务器熔断
+CIRCUIT_FAILURE_THRESHOLD = 5   # 连续多少次连接失败后熔断
+CIRCUIT_BASE_DELAY = 5          # 熔断后第一次试探前的等待时间（秒），之后每次失败加倍
+CIRCUIT_MAX_DELAY = 300         # 试探前的最长等待时间（秒）
+
+# 网络检测
+NETWORK_CHECK_INTERVAL = 60  # 检测间隔（秒）
+NETWORK_CHECK_TIMEOUT = 5    # 连接超时（秒）
+NETWORK_RECHECK_INTERVAL = 10  # 不可达服务器的重新检测间隔（秒）
+
 # UI 相关常量
 UI_TASK_LIST_COLOR_ENABLED = "green"
 UI_TASK_LIST_COLOR_DISABLED = "gray"
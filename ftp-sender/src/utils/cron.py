@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+# 预定义表达式
+_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+_MONTH_NAMES = {name: i + 1 for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+_DAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+# 查找下一次执行时间的范围，超出时认为表达式不会匹配（如 2月30日）
+_MAX_YEARS = 5
+
+
+def _parse_value(text, names):
+    value = names.get(text.lower()) if names else None
+    return value if value is not None else int(text)
+
+
+def _parse_field(text, low, high, names=None):
+    """解析一个字段（支持 *、a-b、/n 和逗号分隔的列表），返回允许的值集合"""
+    values = set()
+    for part in text.split(","):
+        base, sep, step = part.partition("/")
+        step = int(step) if sep else 1
+        if step <= 0:
+            raise ValueError(f"无效的步长: {part}")
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (_parse_value(v, names) for v in base.split("-", 1))
+        else:
+            start = _parse_value(base, names)
+            end = high if sep else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"超出范围 {low}-{high}: {part}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """cron 表达式：分 时 日 月 周（0 或 7 为周日），支持 @daily 等预定义表达式
+
+    与标准 cron 相同，日和周都不以 * 开头时满足其一即执行。时间为本地时间。
+    """
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        text = _ALIASES.get(self.expression.lower(), self.expression)
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式应包含5个字段: {expression}")
+        try:
+            self.minutes = _parse_field(fields[0], 0, 59)
+            self.hours = _parse_field(fields[1], 0, 23)
+            self.days = _parse_field(fields[2], 1, 31)
+            self.months = _parse_field(fields[3], 1, 12, _MONTH_NAMES)
+            weekdays = _parse_field(fields[4], 0, 7, _DAY_NAMES)
+        except ValueError as e:
+            raise ValueError(f"无效的 cron 表达式 {expression}: {e}")
+        # 转换为 datetime.weekday() 的编号（周一为0）
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        # 与 crontab 相同，以 * 开头（包括 */n）的字段不参与“日或周”的判断
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _day_matches(self, dt):
+        in_days = dt.day in self.days
+        in_weekdays = dt.weekday() in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, dt):
+        """dt 之后（不含）的下一次执行时间"""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt.year + _MAX_YEARS
+        while dt.year <= limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"cron 表达式 {self.expression} 没有可执行的时间")
+
+    def next_fire(self, after):
+        """after（时间戳）之后的下一次执行时间戳"""
+        return self.next_after(datetime.fromtimestamp(after)).timestamp()
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from utils.constants import HASH_CACHE_SIZE
+
+HASH_BLOCK_SIZE = 1024 * 1024  # 计算哈希时每次读取的字节数
+
+
+class _Crc32:
+    """与 hashlib 对象接口相同的 CRC32 计算"""
+
+    def __init__(self):
+        self._value = 0
+
+    def update(self, data):
+        self._value = zlib.crc32(data, self._value)
+
+    def hexdigest(self):
+        return f"{self._value & 0xffffffff:08x}"
+
+
+def new_hasher(algorithm='sha256'):
+    """创建哈希对象，支持 crc32 和 hashlib 的所有算法"""
+    if algorithm == 'crc32':
+        return _Crc32()
+    return hashlib.new(algorithm)
+
+
+class MultiHasher:
+    """同时计算多种哈希，update 接口与 hashlib 对象相同"""
+
+    def __init__(self, algorithms):
+        self.hashers = {algorithm: new_hasher(algorithm) for algorithm in algorithms}
+
+    def update(self, data):
+        for hasher in self.hashers.values():
+            hasher.update(data)
+
+    def hexdigests(self):
+        """返回 {算法: 十六进制哈希值}"""
+        return {algorithm: hasher.hexdigest() for algorithm, hasher in self.hashers.items()}
+
+
+def hash_file(path, algorithm='sha256'):
+    """计算文件内容的哈希值（十六进制）"""
+    hasher = new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class HashCache:
+    """文件哈希缓存
+
+    按 (路径, 大小, 修改时间, 算法) 缓存哈希值，文件未变化时再次校验无需重新读取，
+    超过 max_entries 时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_entries=HASH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, size, mtime_ns, algorithm):
+        """获取缓存的哈希值，没有时返回 None"""
+        key = (path, size, mtime_ns, algorithm)
+        with self._lock:
+            digest = self._entries.get(key)
+            if digest is not None:
+                self._entries.move_to_end(key)
+            return digest
+
+    def put(self, path, size, mtime_ns, algorithm, digest):
+        """缓存哈希值"""
+        with self._lock:
+            self._entries[(path, size, mtime_ns, algorithm)] = digest
+            self._entries.move_to_end((path, size, mtime_ns, algorithm))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def compute(self, path, size, mtime_ns, algorithm):
+        """获取哈希值，未缓存时读取文件计算"""
+        digest = self.get(path, size, mtime_ns, algorithm)
+        if digest is None:
+            digest = hash_file(path, algorithm)
+            self.put(path, size, mtime_ns, algorithm, digest)
+        return digest
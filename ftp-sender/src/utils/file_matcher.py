@@ -0,0 +1,58 @@
+import fnmatch
+import os
+import re
+
+MATCH_ALL_PATTERNS = ('*', '*.*')  # 匹配所有文件的模式（与Windows习惯一致）
+GLOB_CHARS = '*?['
+
+
+class _PatternSet:
+    """一组预编译的文件名模式"""
+
+    def __init__(self, patterns):
+        self.match_all = False
+        suffixes = []
+        regexes = []
+        for pattern in patterns or []:
+            pattern = os.path.normcase(pattern.strip())
+            if not pattern:
+                continue
+            if pattern in MATCH_ALL_PATTERNS:
+                self.match_all = True
+            elif pattern.startswith('*') and not any(c in pattern[1:] for c in GLOB_CHARS):
+                # *.txt 这类模式用后缀匹配即可
+                suffixes.append(pattern[1:])
+            elif not any(c in pattern for c in GLOB_CHARS):
+                # 兼容旧配置中不带通配符的后缀写法，如 .txt
+                suffixes.append(pattern)
+            else:
+                regexes.append(fnmatch.translate(pattern))
+        self.suffixes = tuple(suffixes)
+        self.regex = re.compile('|'.join(regexes)) if regexes else None
+        self.empty = not (self.match_all or self.suffixes or self.regex)
+
+    def matches(self, name):
+        if self.match_all:
+            return True
+        if self.suffixes and name.endswith(self.suffixes):
+            return True
+        return bool(self.regex and self.regex.match(name))
+
+
+class FileMatcher:
+    """文件类型匹配器
+
+    将包含和排除的通配符模式一次性编译为后缀元组和单个正则表达式，
+    文件名先按排除模式过滤，再按包含模式匹配。
+    """
+
+    def __init__(self, include=None, exclude=None):
+        self._include = _PatternSet(include)
+        self._exclude = _PatternSet(exclude)
+
+    def matches(self, filename):
+        """判断文件名是否需要发送"""
+        name = os.path.normcase(filename)
+        if not self._exclude.empty and self._exclude.matches(name):
+            return False
+        return self._include.matches(name)
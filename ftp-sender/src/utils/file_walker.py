@@ -0,0 +1,28 @@
+import os
+
+
+def walk_files(root, recursive=False):
+    """逐个返回目录下的文件 (相对路径, os.DirEntry)
+
+    相对路径使用 / 分隔。使用 os.scandir 按目录逐层遍历，不会一次性加载整个目录树，
+    不进入指向目录的符号链接，避免循环。
+    """
+    stack = [('', root)]
+    while stack:
+        prefix, path = stack.pop()
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            if not prefix:
+                raise
+            # 子目录在遍历期间被删除或无权限
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        yield prefix + entry.name, entry
+                    elif recursive and entry.is_dir(follow_symlinks=False):
+                        stack.append((prefix + entry.name + '/', entry.path))
+                except OSError:
+                    continue
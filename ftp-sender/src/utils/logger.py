@@ -12,8 +12,8 @@ class Logger:
         os.makedirs(self.log_dir, exist_ok=True)
         self.send_records: Dict[str, List[dict]] = {}
 
-    def log_success(self, task_name: str, filename: str, retries: int = 0):
-        """记录成功发送的文件"""
+    def log_success(self, task_name: str, filename: str, retries: int = 0, details: dict = None):
+        """记录成功发送的文件，details 为附加信息（完整性校验、压缩统计等）"""
         log_entry = {
             "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "filename": filename,
@@ -21,6 +21,8 @@ class Logger:
             "retries": retries,
             "status": "success"
         }
+        if details:
+            log_entry.update(details)
         self._write_log(task_name, log_entry)
         self._update_send_records(task_name, log_entry)
 
@@ -34,6 +36,25 @@ class Logger:
         }
         self._write_log(task_name, log_entry)
 
+    def log_skipped(self, task_name: str, filename: str, reason: str):
+        """记录未发送（跳过）的文件"""
+        log_entry = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "filename": filename,
+            "reason": reason,
+            "status": "skipped"
+        }
+        self._write_log(task_name, log_entry)
+
+    def log_batch_summary(self, task_name: str, summary: dict):
+        """记录一次批量发送的汇总"""
+        log_entry = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "batch",
+            **summary
+        }
+        self._write_log(task_name, log_entry)
+
     def _write_log(self, task_name: str, log_entry: dict):
         """写入日志文件"""
         log_file = os.path.join(self.log_dir, f"{task_name}.log")